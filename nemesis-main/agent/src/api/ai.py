@@ -2,7 +2,6 @@ from __future__ import annotations
 from typing import List, Dict
 from .config import settings
 from .logging_conf import get_logger
-import httpx
 
 logger = get_logger()
 
@@ -31,6 +30,7 @@ def _openai_chat(messages: List[Dict]) -> str:
 
 # ---------- Ollama backend ----------
 def _ollama_generate(prompt: str) -> str:
+    import httpx
     url = f"{settings.ollama_host.rstrip('/')}/api/generate"
     try:
         with httpx.Client(timeout=60) as client:
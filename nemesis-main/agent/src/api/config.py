@@ -12,6 +12,9 @@ class Settings(BaseModel):
     # Runtime
     mode: str = os.getenv("NEMESIS_MODE", "cautious")
     port: int = int(os.getenv("NEMESIS_PORT", "8000"))
+    # Fast-Startup: Scheduler erst nach SCHED_START_DELAY Sekunden starten
+    fast_startup: bool = os.getenv("NEMESIS_FAST_STARTUP", "0").lower() in ("1", "true", "yes")
+    sched_start_delay: float = float(os.getenv("SCHED_START_DELAY", "5"))
 
     # Scheduler-Intervalle (Minuten)
     sched_cld_shadow_interval: int = int(os.getenv("SCHED_CLD_SHADOW_INTERVAL", "10"))
@@ -22,11 +25,57 @@ class Settings(BaseModel):
     sched_bounty_refresh_interval: int = int(os.getenv("SCHED_BOUNTY_REFRESH_INTERVAL", "20"))
     sched_scan_queue_interval: int = int(os.getenv("SCHED_SCAN_QUEUE_INTERVAL", "10"))
 
+    # Scanner-Cache (Sekunden / Anzahl Einträge)
+    scan_cache_ttl: int = int(os.getenv("SCAN_CACHE_TTL", "900"))
+    scan_cache_max_entries: int = int(os.getenv("SCAN_CACHE_MAX_ENTRIES", "4096"))
+    dns_cache_ttl: int = int(os.getenv("DNS_CACHE_TTL", "300"))
+    dns_negative_ttl: int = int(os.getenv("DNS_NEGATIVE_TTL", "10"))
+
+    # Rate-Limits (Requests/Sekunde je registrierbarer Domain bzw. Plattform, 0 = pausiert)
+    rate_limit_host_rps: float = float(os.getenv("RATE_LIMIT_HOST_RPS", "1"))
+    rate_limit_host_burst: int = int(os.getenv("RATE_LIMIT_HOST_BURST", "2"))
+    rate_limit_platform_rps: float = float(os.getenv("RATE_LIMIT_PLATFORM_RPS", "5"))
+    rate_limit_platform_burst: int = int(os.getenv("RATE_LIMIT_PLATFORM_BURST", "10"))
+    rate_limit_min_rps: float = float(os.getenv("RATE_LIMIT_MIN_RPS", "0.05"))
+    rate_limit_max_wait: float = float(os.getenv("RATE_LIMIT_MAX_WAIT", "5"))
+    scan_queue_lookahead: int = int(os.getenv("SCAN_QUEUE_LOOKAHEAD", "20"))
+    # Targets pro Scan-Tick und Prozesse für die Requests (0 = im API-Prozess)
+    scan_batch_size: int = int(os.getenv("SCAN_BATCH_SIZE", "1"))
+    scan_processes: int = int(os.getenv("SCAN_PROCESSES", "0"))
+
+    # Header-Checks (kommagetrennte Namen, leer = alle registrierten)
+    header_checks: str = os.getenv("HEADER_CHECKS", "")
+
+    # Scheduler-Leader (Multi-Prozess-Betrieb, z.B. uvicorn --workers N)
+    leader_lease_ttl: int = int(os.getenv("LEADER_LEASE_TTL", "30"))
+    # Wie oft der Leader manuelle Auslöser anderer Prozesse abholt (Sekunden)
+    job_request_poll: int = int(os.getenv("JOB_REQUEST_POLL", "2"))
+
     # Workers
     worker_offline_minutes: int = int(os.getenv("WORKER_OFFLINE_MINUTES", "5"))
     sched_worker_maintenance_interval: int = int(os.getenv("SCHED_WORKER_MAINTENANCE_INTERVAL", "5"))
 
+    # SQLite
+    db_read_pool_size: int = int(os.getenv("DB_READ_POOL_SIZE", "8"))
+    db_busy_timeout_ms: int = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+    db_checkpoint_idle_ms: int = int(os.getenv("DB_CHECKPOINT_IDLE_MS", "500"))
+    db_checkpoint_writes: int = int(os.getenv("DB_CHECKPOINT_WRITES", "1000"))
+    db_wal_truncate_pages: int = int(os.getenv("DB_WAL_TRUNCATE_PAGES", "10000"))
+
     # Logging
+    # uvicorn --workers; bei > 1 schreibt jeder Prozess seine eigene Logdatei
+    web_concurrency: int = int(os.getenv("WEB_CONCURRENCY", "1"))
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
+    log_format: str = os.getenv("LOG_FORMAT", "text")          # Konsole: "text" | "json"
+    log_file: str = os.getenv("LOG_FILE", "nemesis.log")        # immer JSON-Zeilen
+    log_file_max_mb: int = int(os.getenv("LOG_FILE_MAX_MB", "10"))
+    log_file_backups: int = int(os.getenv("LOG_FILE_BACKUPS", "5"))
+    log_queue_size: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    log_batch_size: int = int(os.getenv("LOG_BATCH_SIZE", "200"))
+    log_flush_ms: int = int(os.getenv("LOG_FLUSH_MS", "500"))
+    # Identische INFO-Zeilen nur einmal je Fenster (Sekunden, 0 = aus)
+    log_repeat_window: int = int(os.getenv("LOG_REPEAT_WINDOW", "300"))
+    # Sampling je Job für INFO, z.B. "scan_queue=0.1,threat_feed=0.5"
+    log_sample: str = os.getenv("LOG_SAMPLE", "")
 
 settings = Settings()
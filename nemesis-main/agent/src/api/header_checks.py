@@ -0,0 +1,137 @@
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .config import settings
+
+# HSTS gilt erst ab 180 Tagen als ausreichend
+HSTS_MIN_MAX_AGE = 15552000
+
+@dataclass(frozen=True)
+class HeaderCheck:
+    name: str
+    bit: int
+    kind: str          # "presence" | "value" | "cookie"
+    description: str
+    fn: Callable[[Dict[str, str], List[str]], bool]   # True = bestanden
+    requires: Optional[str] = None   # Check läuft nur, wenn dieser Header gesetzt ist
+
+    def applies(self, headers: Dict[str, str], cookies: List[str]) -> bool:
+        if self.kind == "cookie":
+            return bool(cookies)
+        return self.requires is None or self.requires in headers
+
+# Registry: Name -> Check. Bits sind persistiert und dürfen sich nie ändern.
+CHECKS: Dict[str, HeaderCheck] = {}
+
+def register_check(name: str, bit: int, kind: str = "value", description: str = "",
+                   requires: Optional[str] = None):
+    """
+    Decorator zum Registrieren eines Checks. Die Funktion bekommt die
+    Header (Namen lowercase) und alle Set-Cookie-Werte.
+    Mit `requires` wird der Check nur ausgeführt (und im checked_mask
+    gezählt), wenn der Header vorhanden ist; Fehlen meldet der Presence-Check.
+    Cookie-Checks laufen nur, wenn die Antwort Cookies setzt.
+    """
+    if not 0 <= bit < 63:
+        raise ValueError(f"Bit {bit} außerhalb 0..62")
+    def deco(fn):
+        for c in CHECKS.values():
+            if c.bit == bit and c.name != name:
+                raise ValueError(f"Bit {bit} bereits von {c.name} belegt")
+        CHECKS[name] = HeaderCheck(name, bit, kind, description, fn, requires)
+        return fn
+    return deco
+
+def _presence(header: str, bit: int):
+    register_check(header, bit, "presence", f"{header} gesetzt")(lambda h, _c: header in h)
+
+# ---------- Presence ----------
+SEC_HEADERS = [
+    "x-content-type-options",
+    "content-security-policy",
+    "x-frame-options",
+    "referrer-policy",
+    "permissions-policy",
+    "strict-transport-security"
+]
+for _bit, _header in enumerate(SEC_HEADERS):
+    _presence(_header, _bit)
+
+# ---------- Value ----------
+def _csp_directives(value: str) -> Dict[str, str]:
+    out = {}
+    for part in value.split(";"):
+        part = part.strip()
+        if part:
+            name, _, rest = part.partition(" ")
+            out[name.lower()] = rest.strip().lower()
+    return out
+
+@register_check("hsts-max-age", 6, description=f"HSTS max-age >= {HSTS_MIN_MAX_AGE}",
+                requires="strict-transport-security")
+def _hsts_max_age(h, _c):
+    m = re.search(r"max-age\s*=\s*\"?(\d+)", h.get("strict-transport-security", ""), re.I)
+    return bool(m) and int(m.group(1)) >= HSTS_MIN_MAX_AGE
+
+@register_check("csp-no-unsafe-inline", 7, description="CSP erlaubt kein 'unsafe-inline' für Skripte",
+                requires="content-security-policy")
+def _csp_no_unsafe_inline(h, _c):
+    d = _csp_directives(h.get("content-security-policy", ""))
+    src = d.get("script-src", d.get("default-src"))
+    return src is not None and "'unsafe-inline'" not in src
+
+@register_check("csp-frame-ancestors", 8, description="CSP setzt frame-ancestors",
+                requires="content-security-policy")
+def _csp_frame_ancestors(h, _c):
+    return "frame-ancestors" in _csp_directives(h.get("content-security-policy", ""))
+
+@register_check("x-content-type-nosniff", 9, description="X-Content-Type-Options: nosniff",
+                requires="x-content-type-options")
+def _xcto_nosniff(h, _c):
+    return h.get("x-content-type-options", "").strip().lower() == "nosniff"
+
+# ---------- Cookies ----------
+def _cookie_attrs(cookie: str) -> Dict[str, str]:
+    attrs = {}
+    for part in cookie.split(";")[1:]:
+        name, _, value = part.strip().partition("=")
+        attrs[name.lower()] = value.strip().lower()
+    return attrs
+
+@register_check("cookie-secure", 10, "cookie", "Alle Cookies mit Secure")
+def _cookie_secure(_h, cookies):
+    return all("secure" in _cookie_attrs(c) for c in cookies)
+
+@register_check("cookie-httponly", 11, "cookie", "Alle Cookies mit HttpOnly")
+def _cookie_httponly(_h, cookies):
+    return all("httponly" in _cookie_attrs(c) for c in cookies)
+
+@register_check("cookie-samesite", 12, "cookie", "Alle Cookies mit SameSite")
+def _cookie_samesite(_h, cookies):
+    return all(_cookie_attrs(c).get("samesite") in ("lax", "strict", "none") for c in cookies)
+
+# ---------- Public API ----------
+def enabled_checks() -> List[HeaderCheck]:
+    """Aktive Checks laut HEADER_CHECKS (leer = alle), sortiert nach Bit."""
+    wanted = [n.strip() for n in settings.header_checks.split(",") if n.strip()]
+    checks = [CHECKS[n] for n in wanted if n in CHECKS] if wanted else list(CHECKS.values())
+    return sorted(checks, key=lambda c: c.bit)
+
+def evaluate(headers: Dict[str, str], cookies: List[str]) -> Tuple[int, int]:
+    """
+    Führt alle aktiven, anwendbaren Checks aus.
+    Rückgabe: (failed_mask, checked_mask) – je ein Bit pro Check.
+    """
+    failed = checked = 0
+    for c in enabled_checks():
+        if not c.applies(headers, cookies):
+            continue
+        checked |= 1 << c.bit
+        if not c.fn(headers, cookies):
+            failed |= 1 << c.bit
+    return failed, checked
+
+def mask_names(mask: int, kind: str | None = None) -> List[str]:
+    return [c.name for c in sorted(CHECKS.values(), key=lambda c: c.bit)
+            if mask & (1 << c.bit) and (kind is None or c.kind == kind)]
@@ -1,14 +1,18 @@
-from typing import Optional
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
 from datetime import datetime, timezone
 from .storage import (
     add_finding, log_job, add_shadow_rule,
     promote_shadow_to_live, get_latest_shadow_rule_id,
-    list_platforms, add_or_queue_target, pop_next_queued_target, mark_target_scanned,
+    list_platforms, add_or_queue_target, pop_next_queued_target, release_target, mark_target_scanned,
+    save_scan_result,
     set_module_status, mark_stale_workers_offline
 )
 from .logging_conf import get_logger
-from . import scanner
-from . import ai
+from .ratelimit import limiter, RateLimited, BACKOFF_STATUS
 from .config import settings
 
 logger = get_logger()
@@ -20,6 +24,7 @@ def job_cld_shadow():
     und speichert diese als Shadow Rules.
     """
     set_module_status("CLD Shadow", "ok", f"provider={settings.ai_provider}")
+    from . import ai   # lazy: zieht httpx/openai erst beim ersten Lauf
     context = "Web Scan Telemetrie: fehlende Security-Header, Redirect-Ketten, Non-200 Statusspitzen."
     try:
         candidates = ai.generate_rule_candidates(context=context)
@@ -92,18 +97,97 @@ def job_bounty_refresh():
         count += 1
     log_job("bounty_refresh", "INFO", f"Queued {count} target(s)")
 
-def job_scan_queue():
+def _pop_scannable_targets(n: int) -> List[tuple]:
     """
-    Holt das nächste queued-Target, scannt es mit dem sicheren Scanner,
-    speichert Findings und fügt optional eine KI-Zusammenfassung hinzu.
+    Nimmt bis zu n Targets und reserviert für jedes sofort ein Limiter-Token
+    (Host + Plattform); der Scan wartet danach nicht mehr. Targets ohne
+    freies Token gehen zurück in die Queue, damit andere Hosts den Slot nutzen.
     """
-    set_module_status("Scan-Queue", "ok", "scanning")
-    item = pop_next_queued_target()
-    if not item:
+    items, skipped = [], []
+    for _ in range(max(1, settings.scan_queue_lookahead) + n - 1):
+        item = pop_next_queued_target(exclude=skipped)
+        if not item:
+            break
+        tid, platform_id, target, _ = item
+        if limiter.try_acquire(limiter.keys_for(target, platform_id)) <= 0:
+            items.append(item)
+            if len(items) >= n:
+                break
+            continue
+        release_target(tid)
+        skipped.append(tid)
+    if skipped:
+        log_job("scan_queue", "INFO", f"{len(skipped)} target(s) rate-limited, retry next tick")
+    elif not items:
         log_job("scan_queue", "INFO", "No targets in queue")
-        return
+    return items
+
+# Prozess-Pool für Scans (SCAN_PROCESSES > 0), lazy beim ersten Batch erzeugt
+_scan_pool: Optional[ProcessPoolExecutor] = None
+_scan_pool_lock = threading.Lock()
+
+def _get_scan_pool() -> Optional[ProcessPoolExecutor]:
+    global _scan_pool
+    if settings.scan_processes <= 0:
+        return None
+    with _scan_pool_lock:
+        if _scan_pool is None:
+            # spawn statt fork: der API-Prozess hat bereits Threads (Scheduler, SQLite)
+            _scan_pool = ProcessPoolExecutor(max_workers=settings.scan_processes,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        return _scan_pool
+
+def shutdown_scan_pool():
+    global _scan_pool
+    with _scan_pool_lock:
+        if _scan_pool is not None:
+            _scan_pool.shutdown(wait=False, cancel_futures=True)
+            _scan_pool = None
+
+def _discard_scan_pool(pool: ProcessPoolExecutor):
+    """Verwirft einen defekten Pool; der nächste Batch baut einen neuen auf."""
+    global _scan_pool
+    with _scan_pool_lock:
+        if _scan_pool is pool:
+            _scan_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _scan_one(item: tuple, pool: Optional[ProcessPoolExecutor]) -> bool:
+    """
+    Scannt ein gepopptes Target. Wirft nie: jedes Target verlässt den
+    Status 'scanning' wieder (zurück in die Queue oder als 'error').
+    """
+    tid, platform_id, target, scope = item
+    try:
+        return _scan_and_store(item, pool)
+    except RateLimited as e:
+        release_target(tid)
+        log_job("scan_queue", "INFO", f"Deferred {target}: {e}")
+    except BrokenProcessPool as e:
+        # Worker-Prozess abgestürzt: Pool ersetzen, Target im nächsten Tick erneut
+        if pool is not None:
+            _discard_scan_pool(pool)
+        release_target(tid)
+        log_job("scan_queue", "WARN", f"Scan-Prozess-Pool defekt, {target} zurückgestellt: {e}")
+    except Exception as e:
+        mark_target_scanned(tid, False, datetime.now(timezone.utc).isoformat())
+        log_job("scan_queue", "ERROR", f"Scan fehlgeschlagen: {target} ({e})")
+    return False
+
+def _scan_and_store(item: tuple, pool: Optional[ProcessPoolExecutor]) -> bool:
     tid, platform_id, target, scope = item
-    findings = scanner.scan_target(target)
+    from . import ai, scanner   # lazy: hält den API-Start schlank
+    # Token wurde schon in _pop_scannable_targets reserviert
+    res = scanner.scan(target, platform=platform_id, executor=pool, reserved=True)
+    if res.status_code in BACKOFF_STATUS:
+        # Host drosselt (429/503): Bucket ist schon gebremst, Target später erneut
+        release_target(tid)
+        log_job("scan_queue", "INFO", f"Deferred {target}: HTTP {res.status_code}")
+        return False
+    findings = res.findings
+    # Nur echte Seiten in die Header-Statistik; Fehlerseiten (4xx/5xx) haben selten Security-Header
+    if not res.error and res.status_code is not None and 200 <= res.status_code < 400:
+        save_scan_result(tid, res.url, res.status_code, res.header_fail_mask, res.header_checked_mask)
     now = datetime.now(timezone.utc).isoformat()
     ok = True
     for f in findings:
@@ -120,6 +204,24 @@ def job_scan_queue():
 
     mark_target_scanned(tid, ok, now)
     log_job("scan_queue", "INFO", f"Scanned {target} (ok={ok}, findings={len(findings)})")
+    return True
+
+def job_scan_queue() -> int:
+    """
+    Holt bis zu SCAN_BATCH_SIZE queued-Targets, scannt sie mit dem sicheren
+    Scanner (bei SCAN_PROCESSES > 0 verteilt auf einen Prozess-Pool),
+    speichert Findings und fügt optional eine KI-Zusammenfassung hinzu.
+    Rückgabe: Anzahl gescannter Targets.
+    """
+    set_module_status("Scan-Queue", "ok", "scanning")
+    items = _pop_scannable_targets(max(1, settings.scan_batch_size))
+    if not items:
+        return 0
+    pool = _get_scan_pool()
+    if len(items) == 1:
+        return int(_scan_one(items[0], pool))
+    with ThreadPoolExecutor(max_workers=len(items)) as ex:
+        return sum(ex.map(lambda it: _scan_one(it, pool), items))
 
 # ---- Workers Maintenance ----
 def job_workers_maintenance(max_minutes_offline: int = 5):
@@ -0,0 +1,75 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+from . import storage
+from .logging_conf import get_logger
+
+logger = get_logger()
+
+class LeaderElector:
+    """
+    Wählt über eine SQLite-Lease genau einen Prozess als Scheduler-Leader.
+    Der Leader verlängert die Lease alle ttl/3 Sekunden; alle anderen
+    versuchen es im selben Takt und übernehmen, sobald sie abgelaufen ist.
+    """
+    def __init__(self, on_elected: Callable[[], None], on_demoted: Callable[[], None],
+                 ttl: float = 30.0, name: str = "scheduler"):
+        self.name = name
+        self.ttl = ttl
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.is_leader = False
+        self._expires_at = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="leader-elector", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.ttl)
+        if self.is_leader:
+            self._demote()
+            try:
+                storage.release_lease(self.name, self.holder)
+            except Exception as e:
+                logger.warning(f"Lease-Freigabe fehlgeschlagen: {e}")
+
+    def tick(self):
+        try:
+            now = time.monotonic()
+            leader = storage.acquire_lease(self.name, self.holder, self.ttl)
+            if leader:
+                self._expires_at = now + self.ttl
+        except Exception as e:
+            # DB kurz nicht erreichbar: Leader bleibt bis zum Ablauf der eigenen Lease
+            logger.warning(f"Lease-Erneuerung fehlgeschlagen: {e}")
+            leader = self.is_leader and time.monotonic() < self._expires_at
+        if leader and not self.is_leader:
+            self.is_leader = True
+            logger.info(f"Scheduler-Leader: {self.holder}")
+            self.on_elected()
+        elif not leader and self.is_leader:
+            logger.warning(f"Leader-Lease verloren: {self.holder}")
+            self._demote()
+
+    def _demote(self):
+        self.is_leader = False
+        self.on_demoted()
+
+    def _run(self):
+        while True:
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Leader-Election-Fehler: {e}")
+            if self._stop.wait(self.ttl / 3):
+                return
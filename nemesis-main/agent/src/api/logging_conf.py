@@ -1,18 +1,288 @@
 from loguru import logger
-import sys
+import atexit
+import json
 import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from datetime import timezone
+from typing import Dict, List, Optional, Tuple
+
+from .config import settings
+
+_configured = False
+_config_lock = threading.Lock()
+_sink: Optional["BatchSink"] = None
+_filter: Optional["LogFilter"] = None
+
+# ---------- Sampling / Rate-Limit ----------
+def _parse_sample(spec: str) -> Dict[str, float]:
+    """"scan_queue=0.1,cld_shadow=0.5" -> {"scan_queue": 0.1, ...}"""
+    rates = {}
+    for part in spec.split(","):
+        name, _, value = part.partition("=")
+        if name.strip() and value.strip():
+            rates[name.strip()] = min(1.0, max(0.0, float(value)))
+    return rates
+
+class LogFilter:
+    """
+    Filter vor der Queue (läuft im aufrufenden Thread, nur Dict-Zugriffe):
+    - INFO/DEBUG je Job mit fester Rate sampeln (LOG_SAMPLE)
+    - identische INFO/DEBUG-Zeilen innerhalb LOG_REPEAT_WINDOW unterdrücken;
+      die nächste durchgelassene Zeile trägt die Anzahl als `repeated`
+    WARNING und höher passieren immer. Job-Records (log_job) unterliegen
+    nicht LOG_LEVEL, damit jobs_log vollständig bleibt; ob sie zusätzlich
+    in Konsole/Datei landen, entscheidet der Sink.
+    """
+    def __init__(self, level: str, sample: Dict[str, float], repeat_window: float):
+        self.min_level = logger.level(level).no
+        self.sample = sample
+        self.repeat_window = repeat_window
+        self._counters: Dict[str, float] = {}
+        self._seen: Dict[Tuple[str, str], Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def __call__(self, record) -> bool:
+        if record["level"].no < self.min_level and "job" not in record["extra"]:
+            return False
+        if record["level"].no >= logger.level("WARNING").no:
+            return True
+        job = record["extra"].get("job") or record["name"]
+        with self._lock:
+            rate = self.sample.get(job)
+            if rate is not None:
+                # deterministisch: jede (1/rate)-te Zeile durchlassen
+                acc = self._counters.get(job, 1.0) + rate
+                if acc < 1.0:
+                    self._counters[job] = acc
+                    self.suppressed += 1
+                    return False
+                self._counters[job] = acc - 1.0
+            if self.repeat_window <= 0:
+                return True
+            key = (job, record["message"])
+            now = time.monotonic()
+            last, skipped = self._seen.get(key, (0.0, 0))
+            if last and now - last < self.repeat_window:
+                self._seen[key] = (last, skipped + 1)
+                self.suppressed += 1
+                return False
+            if len(self._seen) > 10000:
+                self._seen.clear()
+            self._seen[key] = (now, 0)
+        if skipped:
+            record["extra"]["repeated"] = skipped
+        return True
+
+# ---------- Batch-Sink ----------
+class BatchSink:
+    """
+    Ein Sink für Konsole, JSON-Logdatei und jobs_log. Records landen in einer
+    begrenzten Queue (voll = verwerfen statt blockieren); ein Writer-Thread
+    schreibt sie gebündelt weg.
+    """
+    def __init__(self, path: str, max_bytes: int, backups: int, console_json: bool,
+                 queue_size: int, batch_size: int, flush_interval: float, min_level: int = 0):
+        self.path = path
+        self.min_level = min_level   # gilt für Konsole/Datei, nicht für jobs_log
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.console_json = console_json
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=max(1, queue_size))
+        self._fh = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def __call__(self, message):
+        r = message.record
+        entry = {
+            "ts": r["time"].isoformat(),
+            "level": r["level"].name,
+            "msg": r["message"],
+            "module": r["name"],
+            "function": r["function"],
+            "line": r["line"],
+        }
+        extra = {k: v for k, v in r["extra"].items() if k != "job_level"}
+        if extra:
+            entry.update(extra)
+        if r["exception"] is not None:
+            exc_type, exc_value, exc_tb = r["exception"]
+            entry["exception"] = "".join(traceback.format_exception(exc_type, exc_value, exc_tb))
+        if r["level"].no < self.min_level:
+            entry["_quiet"] = True   # nur jobs_log
+        if "job" in extra:
+            entry["_job_level"] = r["extra"].get("job_level", r["level"].name)
+            entry["_created_at"] = r["time"].astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    # --- Writer-Thread ---
+    def _run(self):
+        while not self._stop.is_set():
+            self._drain(block=True)
+        while self._drain(block=False):
+            pass
+
+    def _drain(self, block: bool):
+        batch: List[dict] = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if block and timeout > 0:
+                    batch.append(self._queue.get(timeout=timeout))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        return len(batch)
+
+    def _write(self, batch: List[dict]):
+        jobs_rows = []
+        shown = []
+        for e in batch:
+            job_level = e.pop("_job_level", None)
+            created_at = e.pop("_created_at", None)
+            if not e.pop("_quiet", False):
+                shown.append(e)
+            if job_level is not None:
+                msg = e["msg"] + (f" (+{e['repeated']} wiederholt)" if e.get("repeated") else "")
+                jobs_rows.append((e["job"], job_level, msg, created_at))
+        if shown:
+            lines = [json.dumps(e, ensure_ascii=False, default=str) for e in shown]
+            try:
+                if self.console_json:
+                    sys.stdout.write("\n".join(lines) + "\n")
+                else:
+                    sys.stdout.write("".join(self._format_text(e) for e in shown))
+                sys.stdout.flush()
+            except Exception:
+                pass
+            try:
+                self._write_file("\n".join(lines) + "\n")
+            except OSError:
+                pass
+        if jobs_rows:
+            try:
+                from . import storage   # lazy: storage importiert selbst logging_conf
+                storage.add_job_logs(jobs_rows)
+            except Exception as e:
+                sys.stderr.write(f"jobs_log-Schreiben fehlgeschlagen: {e}\n")
+
+    @staticmethod
+    def _format_text(e: dict) -> str:
+        line = (f"{e['ts'][:23].replace('T', ' ')} | {e['level']:<8} | {e['module']}:{e['function']}:{e['line']} - "
+                f"{e['msg']}{' (+%d)' % e['repeated'] if e.get('repeated') else ''}\n")
+        return line + e.get("exception", "")
+
+    def _write_file(self, data: str):
+        if self._fh is None:
+            self._fh = open(self.path, "a", encoding="utf-8")
+        self._fh.write(data)
+        self._fh.flush()
+        if self.max_bytes and self._fh.tell() >= self.max_bytes:
+            self._fh.close()
+            self._fh = None
+            for i in range(self.backups - 1, 0, -1):
+                src = f"{self.path}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.path}.{i + 1}")
+            if self.backups > 0:
+                os.replace(self.path, f"{self.path}.1")
+            else:
+                os.remove(self.path)
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self):
+        """Wartet, bis der Writer-Thread alles bisher Eingereihte geschrieben hat."""
+        self._queue.join()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+def _log_path() -> str:
+    """
+    LOG_FILE; bei mehreren uvicorn-Workern mit PID im Namen (nemesis.<pid>.log),
+    sonst rotieren die Prozesse sich die Datei gegenseitig unter den Füßen weg.
+    """
+    if settings.web_concurrency <= 1:
+        return settings.log_file
+    root, ext = os.path.splitext(settings.log_file)
+    return f"{root}.{os.getpid()}{ext}"
 
 def configure_logger():
     """
-    Konfiguriert den globalen Logger:
-    - Schreibt Logs in die Konsole (stdout)
-    - Schreibt Logs in eine Datei (nemesis.log)
-    - Log-Level wird aus ENV LOG_LEVEL gelesen (Default: INFO)
+    Konfiguriert den globalen Logger genau einmal pro Prozess:
+    - ein Sink (Konsole + JSON-Datei, siehe _log_path + jobs_log) hinter einer
+      begrenzten Queue, geschrieben in Batches
+    - Log-Level aus LOG_LEVEL, Konsolenformat aus LOG_FORMAT (text|json)
+    - Sampling (LOG_SAMPLE) und Unterdrückung wiederholter INFO-Zeilen
+      (LOG_REPEAT_WINDOW)
+    Weitere Aufrufe liefern nur den Logger zurück.
     """
-    level = os.getenv("LOG_LEVEL", "INFO")
-    logger.remove()  # Entfernt Standard-Handler
-    logger.add(sys.stdout, level=level, enqueue=True, backtrace=False, diagnose=False)
-    logger.add("nemesis.log", level=level, rotation="10 MB", retention="7 days", enqueue=True)
-    return logger
+    global _configured, _sink, _filter
+    with _config_lock:
+        if _configured:
+            return logger
+        logger.remove()  # Entfernt Standard-Handler
+        _sink = BatchSink(
+            path=_log_path(),
+            max_bytes=settings.log_file_max_mb * 1024 * 1024,
+            backups=settings.log_file_backups,
+            console_json=settings.log_format.lower() == "json",
+            queue_size=settings.log_queue_size,
+            batch_size=settings.log_batch_size,
+            flush_interval=settings.log_flush_ms / 1000,
+            min_level=logger.level(settings.log_level.upper()).no,
+        )
+        _filter = LogFilter(settings.log_level.upper(), _parse_sample(settings.log_sample),
+                            settings.log_repeat_window)
+        logger.add(_sink, level=0, filter=_filter, backtrace=False, diagnose=False, catch=True)
+        atexit.register(shutdown_logging)
+        _configured = True
+        return logger
+
+def log_stats() -> dict:
+    if _sink is None:
+        return {}
+    return {"queued": _sink.pending(), "dropped": _sink.dropped,
+            "suppressed": _filter.suppressed if _filter else 0}
+
+def flush_logs():
+    if _sink is not None:
+        _sink.flush()
+
+def shutdown_logging():
+    """Restliche Records schreiben und den Writer-Thread beenden."""
+    global _configured, _sink
+    with _config_lock:
+        if _sink is not None:
+            logger.remove()
+            _sink.close()
+            _sink = None
+        _configured = False
 
 get_logger = configure_logger
@@ -1,21 +1,27 @@
+import time
+_BOOT_T0 = time.perf_counter()  # Startpunkt für das Startup-Profil, muss zuerst stehen
+
+import os
+import threading
 from fastapi import FastAPI, Request, Form, Body
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 from typing import Optional
-from apscheduler.schedulers.background import BackgroundScheduler
 from dotenv import load_dotenv
 
 from .config import settings
-from .logging_conf import get_logger
+from .logging_conf import get_logger, log_stats, shutdown_logging
 from . import jobs
 from . import storage
+from . import header_checks
+from .leader import LeaderElector
 
 load_dotenv()
 logger = get_logger()
 
 app = FastAPI(title="Nemesis AIO (Bounty-enabled)", version="1.3.0")
+app.state.boot = {}
 
 # --- Pfade für Templates/Static ---
 import pathlib
@@ -24,7 +30,16 @@ TEMPLATES_DIR = BASE_DIR / "templates"
 STATIC_DIR = BASE_DIR / "static"
 
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
-templates = Jinja2Templates(directory=TEMPLATES_DIR)
+
+# Jinja2 erst beim ersten Seitenaufruf laden
+_templates = None
+
+def get_templates():
+    global _templates
+    if _templates is None:
+        from fastapi.templating import Jinja2Templates
+        _templates = Jinja2Templates(directory=TEMPLATES_DIR)
+    return _templates
 
 # --- Models ---
 class RuleIn(BaseModel):
@@ -35,12 +50,11 @@ class WorkerBeat(BaseModel):
     token: str
 
 # --- Lifecycle ---
-@app.on_event("startup")
-def on_startup():
-    # DB init
-    storage.init_db()
+def _ms(since: float) -> float:
+    return round((time.perf_counter() - since) * 1000, 1)
 
-    # Scheduler
+def _build_scheduler():
+    from apscheduler.schedulers.background import BackgroundScheduler
     sched = BackgroundScheduler(timezone="UTC")
     # Core
     sched.add_job(jobs.job_cld_shadow, "interval",
@@ -68,19 +82,100 @@ def on_startup():
                   minutes=settings.sched_worker_maintenance_interval,
                   id="workers_maintenance", replace_existing=True,
                   kwargs={"max_minutes_offline": settings.worker_offline_minutes})
+    # Manuelle Auslöser aus anderen Prozessen
+    sched.add_job(_run_requested_jobs, "interval",
+                  seconds=max(1, settings.job_request_poll),
+                  id="job_requests", replace_existing=True)
+    return sched
+
+# Manuell auslösbare Jobs, die Limiter/Scan-Cache brauchen und daher nur im Leader laufen
+_LEADER_JOBS = {
+    "bounty_refresh": jobs.job_bounty_refresh,
+    "scan_queue": jobs.job_scan_queue,
+}
 
+def _run_requested_jobs():
+    for name in storage.take_job_requests():
+        fn = _LEADER_JOBS.get(name)
+        if fn is None:
+            continue
+        try:
+            fn()
+        except Exception as e:
+            logger.error(f"Angeforderter Job {name} fehlgeschlagen: {e}")
+
+def _is_leader() -> bool:
+    elector = getattr(app.state, "elector", None)
+    return bool(elector and elector.is_leader)
+
+def _run_on_leader(name: str) -> bool:
+    """
+    Führt einen Leader-Job direkt aus, wenn dieser Prozess Leader ist;
+    sonst wird er in job_requests vorgemerkt. Rückgabe: True = lief hier.
+    """
+    if _is_leader():
+        _LEADER_JOBS[name]()
+        return True
+    storage.request_job(name)
+    return False
+
+def _start_scheduler():
+    t = time.perf_counter()
+    # Vom vorherigen Leader gepoppte, nie abgeschlossene Targets wieder einreihen
+    requeued = storage.requeue_scanning_targets()
+    if requeued:
+        logger.warning(f"{requeued} Target(s) aus 'scanning' wieder eingereiht")
+    sched = _build_scheduler()
     app.state.scheduler = sched
     sched.start()
+    app.state.boot["scheduler_ms"] = _ms(t)
+    logger.info(f"Scheduler gestartet ({app.state.boot['scheduler_ms']} ms)")
 
-    logger.info("Nemesis AIO gestartet.")
+def _stop_scheduler():
+    sched = getattr(app.state, "scheduler", None)
+    app.state.scheduler = None
+    if sched:
+        sched.shutdown(wait=False)
+        logger.info("Scheduler gestoppt")
+
+@app.on_event("startup")
+def on_startup():
+    boot = app.state.boot
+    # DB init (DDL nur, wenn die Schema-Version nicht passt)
+    t = time.perf_counter()
+    boot["schema_migrated"] = storage.init_db()
+    boot["init_db_ms"] = _ms(t)
+
+    # Scheduler läuft nur im Leader-Prozess (SQLite-Lease), alle Prozesse bedienen HTTP.
+    # Im Fast-Startup-Modus startet die Wahl verzögert, damit /healthz sofort antwortet.
+    elector = LeaderElector(on_elected=_start_scheduler, on_demoted=_stop_scheduler,
+                            ttl=settings.leader_lease_ttl)
+    app.state.elector = elector
+    if settings.fast_startup:
+        timer = threading.Timer(settings.sched_start_delay, elector.start)
+        timer.daemon = True
+        app.state.scheduler_timer = timer
+        timer.start()
+    else:
+        elector.start()
+
+    boot["startup_ms"] = _ms(_BOOT_T0)
+    logger.info(f"Nemesis AIO gestartet ({boot['startup_ms']} ms seit Import).")
     if not settings.openai_api_key and settings.ai_provider == "openai":
         logger.warning("OPENAI_API_KEY fehlt – KI-Funktionen (OpenAI) sind deaktiviert.")
 
 @app.on_event("shutdown")
 def on_shutdown():
-    sched = getattr(app.state, "scheduler", None)
-    if sched:
-        sched.shutdown(wait=False)
+    timer = getattr(app.state, "scheduler_timer", None)
+    if timer:
+        timer.cancel()
+    elector = getattr(app.state, "elector", None)
+    if elector:
+        elector.stop()
+    _stop_scheduler()
+    jobs.shutdown_scan_pool()
+    shutdown_logging()   # schreibt offene jobs_log-Batches, daher vor storage.close()
+    storage.close()
 
 # --- Pages ---
 @app.get("/", response_class=HTMLResponse)
@@ -100,7 +195,7 @@ def dashboard(request: Request):
         "mode": settings.mode,
         "openai_api_key_set": bool(settings.openai_api_key),
     }
-    return templates.TemplateResponse("index.html", {
+    return get_templates().TemplateResponse("index.html", {
         "request": request,
         "findings": f, "shadow": shadow, "live": live, "jobs": jl,
         "platforms": plats, "targets": targets, "mods": mods,
@@ -115,7 +210,7 @@ def modules_page(request: Request):
         "running_workers": storage.count_workers_online(minutes=settings.worker_offline_minutes),
         "progress": storage.research_progress(),
     }
-    return templates.TemplateResponse("modules.html", {"request": request, "mods": mods, "metrics": metrics})
+    return get_templates().TemplateResponse("modules.html", {"request": request, "mods": mods, "metrics": metrics})
 
 @app.get("/workers", response_class=HTMLResponse)
 def workers_page(request: Request):
@@ -126,13 +221,21 @@ def workers_page(request: Request):
         "progress": storage.research_progress(),
     }
     host = request.url.scheme + "://" + request.url.netloc
-    return templates.TemplateResponse("workers.html", {"request": request, "workers": workers, "metrics": metrics, "host": host})
+    return get_templates().TemplateResponse("workers.html", {"request": request, "workers": workers, "metrics": metrics, "host": host})
 
 # --- Health / Config / Metrics ---
 @app.get("/healthz")
 def healthz():
     return {"ok": True, "message": "nemesis alive"}
 
+@app.get("/startup")
+def startup_profile():
+    """Zeiten des letzten Starts (Import, DB-Init, Scheduler) in ms, dazu der aktuelle Leader."""
+    lease = storage.get_lease("scheduler")
+    return {"ok": True, "fast_startup": settings.fast_startup, "boot": app.state.boot,
+            "pid": os.getpid(), "scheduler_leader": _is_leader(),
+            "lease": {"holder": lease[0], "expires_in_s": round(lease[1] - time.time(), 1)} if lease else None}
+
 @app.get("/config")
 def show_config():
     safe = {
@@ -155,9 +258,38 @@ def get_metrics():
             "running_scans": storage.count_running_scans(),
             "running_workers": storage.count_workers_online(minutes=settings.worker_offline_minutes),
             "progress": storage.research_progress(),
-        }
+        },
+        "logging": log_stats(),
     }
 
+@app.get("/metrics/headers")
+def get_header_metrics(fail: Optional[str] = None):
+    """
+    Anzahl Targets je fehlgeschlagenem Header-Check (aus den Bitmasken aggregiert).
+    Mit ?fail=check1,check2 zusätzlich die Zahl der Targets, die alle
+    genannten Checks nicht bestanden haben.
+    """
+    if fail:
+        names = [n.strip() for n in fail.split(",") if n.strip()]
+        unknown = [n for n in names if n not in header_checks.CHECKS]
+        if unknown:
+            return {"ok": False, "error": f"unbekannte Checks: {', '.join(unknown)}"}
+        mask = 0
+        for n in names:
+            mask |= 1 << header_checks.CHECKS[n].bit
+        return {"ok": True, "fail": names, "mask": mask,
+                "targets": storage.count_targets_failing(mask)}
+    failing = {c.name: 0 for c in header_checks.CHECKS.values()}
+    checked = dict(failing)
+    for fail_mask, checked_mask, n in storage.header_mask_counts():
+        for c in header_checks.CHECKS.values():
+            bit = 1 << c.bit
+            if checked_mask & bit:
+                checked[c.name] += n
+                if fail_mask & bit:
+                    failing[c.name] += n
+    return {"ok": True, "failing": failing, "checked": checked}
+
 # --- Rules ---
 @app.post("/rules/shadow")
 def add_shadow_rule_json(rule: RuleIn = Body(...)):
@@ -196,14 +328,16 @@ def toggle_platform_html(pid: int = Form(...), enable: int = Form(...)):
     storage.set_platform_enabled(pid, enabled=bool(enable))
     return RedirectResponse(url="/", status_code=303)
 
+# Refresh/Scan laufen nur im Scheduler-Leader (ein Limiter, ein Scan-Cache);
+# andere Prozesse merken sie vor, der Leader holt sie binnen JOB_REQUEST_POLL ab.
 @app.post("/bounties/refresh")
 def bounty_refresh_html():
-    jobs.job_bounty_refresh()
+    _run_on_leader("bounty_refresh")
     return RedirectResponse(url="/", status_code=303)
 
 @app.post("/scan/queue")
 def scan_queue_html():
-    jobs.job_scan_queue()
+    _run_on_leader("scan_queue")
     return RedirectResponse(url="/", status_code=303)
 
 # --- Workers ---
@@ -218,3 +352,5 @@ def register_worker_html(name: str = Form(...)):
 def workers_heartbeat(beat: WorkerBeat):
     ok = storage.heartbeat_worker(beat.name.strip(), beat.token.strip())
     return {"ok": ok}
+
+app.state.boot["import_ms"] = _ms(_BOOT_T0)
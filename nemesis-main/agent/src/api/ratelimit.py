@@ -0,0 +1,228 @@
+import ipaddress
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from .config import settings
+
+# Gängige mehrteilige Public Suffixes (kein vollständiger PSL-Ersatz)
+_MULTI_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "com.au", "net.au", "org.au",
+    "co.nz", "co.jp", "ne.jp", "co.in", "com.br", "com.cn", "com.mx",
+    "co.za", "com.tr", "co.kr", "com.sg", "com.hk", "co.il",
+}
+
+# Statuscodes, bei denen wir die Rate drosseln
+BACKOFF_STATUS = (429, 503)
+
+# Ab dieser Anzahl Buckets werden unbenutzte wieder verworfen
+_MAX_BUCKETS = 10000
+
+class RateLimited(Exception):
+    """Kein Token innerhalb der erlaubten Wartezeit verfügbar."""
+    def __init__(self, keys: List[str], wait: float):
+        retry = "paused" if wait == float("inf") else f"retry in {wait:.1f}s"
+        super().__init__(f"rate limited ({', '.join(keys)}), {retry}")
+        self.keys = keys
+        self.wait = wait
+
+# ---------- Helpers ----------
+def registrable_domain(host: str) -> str:
+    """
+    Näherung an die registrierbare Domain (eTLD+1), z.B.
+    api.shop.example.co.uk -> example.co.uk. IP-Adressen bleiben unverändert.
+    """
+    host = (host or "").strip().lower().rstrip(".")
+    try:
+        ipaddress.ip_address(host)
+        return host
+    except ValueError:
+        pass
+    labels = host.split(".")
+    if len(labels) <= 2:
+        return host
+    n = 3 if ".".join(labels[-2:]) in _MULTI_SUFFIXES else 2
+    return ".".join(labels[-n:])
+
+def parse_retry_after(value: Optional[str]) -> float:
+    """Retry-After als Sekunden (Zahl oder HTTP-Datum); 0 wenn unbrauchbar."""
+    if not value:
+        return 0.0
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return 0.0
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+# ---------- Token Bucket ----------
+class TokenBucket:
+    """
+    Token-Bucket mit adaptiver Rate (AIMD): bei 429/503 wird die Rate
+    halbiert und ggf. bis Retry-After gesperrt, saubere Antworten
+    erhöhen sie schrittweise wieder bis zur konfigurierten Obergrenze.
+    Rate <= 0 bedeutet pausiert: es gibt nie ein Token.
+    """
+    def __init__(self, rate: float, burst: int, min_rate: float):
+        rate = max(0.0, rate)
+        self.max_rate = rate
+        # Untergrenze > 0, sonst bliebe ein gedrosselter Host nach penalize() für immer gesperrt
+        self.min_rate = min(max(min_rate, 0.001), rate)
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.blocked_until = 0.0
+        self._last = time.monotonic()
+
+    def _refill(self, now: float):
+        if now > self._last:
+            self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+            self._last = now
+
+    def wait_time(self, now: float) -> float:
+        if self.max_rate <= 0:
+            return float("inf")
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def idle(self, now: float) -> bool:
+        self._refill(now)
+        return (self.tokens >= self.burst and self.rate >= self.max_rate
+                and self.blocked_until <= now)
+
+    def take(self):
+        self.tokens -= 1
+
+    def give_back(self):
+        self.tokens = min(self.burst, self.tokens + 1)
+
+    def penalize(self, now: float, retry_after: float = 0.0):
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = 0.0
+        self.blocked_until = max(self.blocked_until, now + retry_after)
+
+    def reward(self):
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+# ---------- Limiter ----------
+class RateLimiter:
+    """
+    Höflichkeits-Limiter je registrierbarer Domain und je Plattform.
+    Ein Request braucht ein Token aus allen beteiligten Buckets.
+    """
+    def __init__(self, host_rate: float, host_burst: int,
+                 platform_rate: float, platform_burst: int, min_rate: float):
+        self.host_rate, self.host_burst = host_rate, host_burst
+        self.platform_rate, self.platform_burst = platform_rate, platform_burst
+        self.min_rate = min_rate
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def keys_for(url: str, platform=None) -> List[str]:
+        if "://" not in url:
+            url = "https://" + url
+        try:
+            host = urlsplit(url).hostname or ""
+        except ValueError:
+            host = url.split("://", 1)[1].split("/", 1)[0]   # kaputte URL: Rohwert als Schlüssel
+        keys = [f"host:{registrable_domain(host)}"]
+        if platform is not None:
+            keys.append(f"platform:{platform}")
+        return keys
+
+    def _bucket(self, key: str) -> TokenBucket:
+        b = self._buckets.get(key)
+        if b is None:
+            if len(self._buckets) >= _MAX_BUCKETS:
+                self._prune()
+            if key.startswith("platform:"):
+                b = TokenBucket(self.platform_rate, self.platform_burst, self.min_rate)
+            else:
+                b = TokenBucket(self.host_rate, self.host_burst, self.min_rate)
+            self._buckets[key] = b
+        return b
+
+    def _prune(self):
+        now = time.monotonic()
+        for k in [k for k, b in self._buckets.items() if b.idle(now)]:
+            del self._buckets[k]
+
+    def wait_time(self, keys: Iterable[str]) -> float:
+        now = time.monotonic()
+        with self._lock:
+            return max((self._bucket(k).wait_time(now) for k in keys), default=0.0)
+
+    def try_acquire(self, keys: Iterable[str]) -> float:
+        """
+        Nimmt ein Token aus allen Buckets, falls überall verfügbar.
+        Rückgabe: 0 bei Erfolg, sonst Sekunden bis zum nächsten Versuch.
+        """
+        keys = list(keys)
+        now = time.monotonic()
+        with self._lock:
+            buckets = [self._bucket(k) for k in keys]
+            wait = max((b.wait_time(now) for b in buckets), default=0.0)
+            if wait > 0:
+                return wait
+            for b in buckets:
+                b.take()
+            return 0.0
+
+    def refund(self, keys: Iterable[str]):
+        """Gibt ein per try_acquire() reserviertes, aber ungenutztes Token zurück."""
+        with self._lock:
+            for k in keys:
+                self._bucket(k).give_back()
+
+    def acquire(self, keys: Iterable[str], timeout: float = 0.0):
+        """Wartet höchstens `timeout` Sekunden auf ein Token, sonst RateLimited."""
+        keys = list(keys)
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(keys)
+            if wait <= 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise RateLimited(keys, wait)
+            time.sleep(wait)
+
+    def feedback(self, keys: Iterable[str], status_code: int, retry_after: Optional[str] = None):
+        """
+        Passt die Raten an die Antwort des Hosts an. Plattform-Buckets bleiben
+        fest, ein 429 eines Programms soll nicht die ganze Plattform bremsen.
+        """
+        now = time.monotonic()
+        with self._lock:
+            for k in keys:
+                if k.startswith("platform:"):
+                    continue
+                b = self._bucket(k)
+                if status_code in BACKOFF_STATUS:
+                    b.penalize(now, parse_retry_after(retry_after))
+                elif status_code < 500:
+                    b.reward()
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+limiter = RateLimiter(
+    host_rate=settings.rate_limit_host_rps,
+    host_burst=settings.rate_limit_host_burst,
+    platform_rate=settings.rate_limit_platform_rps,
+    platform_burst=settings.rate_limit_platform_burst,
+    min_rate=settings.rate_limit_min_rps,
+)
@@ -1,50 +1,294 @@
+import os
+import socket
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+import httpcore
 import httpx
-from typing import List, Dict
 
-# Security-Header, die wir prüfen wollen
-SEC_HEADERS = [
-    "x-content-type-options",
-    "content-security-policy",
-    "x-frame-options",
-    "referrer-policy",
-    "permissions-policy",
-    "strict-transport-security"
-]
+from . import header_checks
+from .config import settings
+from .ratelimit import BACKOFF_STATUS, limiter
+
+_MISSING = object()
+_DEFAULT_PORTS = {"http": 80, "https": 443}
 
-def scan_target(url: str) -> List[Dict]:
+# ---------- Cache ----------
+class TTLCache:
     """
-    Führt einen sicheren, Low-Impact Scan durch:
-    - Prüft Erreichbarkeit (HTTP-Status)
-    - Prüft das Vorhandensein wichtiger Security-Header
+    Thread-sicherer LRU-Cache mit fester Lebensdauer pro Eintrag.
+    Abgelaufene Einträge werden beim Zugriff verworfen, bei Überlauf
+    fliegt der am längsten nicht genutzte Eintrag raus.
+    """
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISSING
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+_result_cache = TTLCache(settings.scan_cache_ttl, settings.scan_cache_max_entries)
+_dns_cache = TTLCache(settings.dns_cache_ttl, settings.scan_cache_max_entries)
+
+# Laufende Scans je normalisierter URL (Request-Coalescing)
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+class _CachedDNSBackend(httpcore.SyncBackend):
+    """
+    Verbindet zu den Adressen aus dem DNS-Cache statt erneut aufzulösen.
+    Host-Header und TLS-SNI bleiben der Hostname (kommen aus der URL).
+    """
+    def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        addrs = resolve_host(host)
+        if not addrs:
+            raise httpcore.ConnectError(f"DNS: {host} nicht auflösbar")
+        for i, addr in enumerate(addrs):
+            try:
+                return super().connect_tcp(addr, port, timeout=timeout, local_address=local_address,
+                                           socket_options=socket_options)
+            except httpcore.ConnectError:
+                if i == len(addrs) - 1:
+                    raise
+
+class _CachedDNSTransport(httpx.HTTPTransport):
+    """
+    HTTPTransport mit eigenem httpcore-Pool, der über _CachedDNSBackend
+    verbindet (httpx reicht network_backend nicht durch). Limits wie httpx-Default.
+    """
+    def __init__(self):
+        super().__init__()
+        limits = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        self._pool = httpcore.ConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=_CachedDNSBackend(),
+        )
+
+def _env_proxies() -> bool:
+    return any(k in urllib.request.getproxies() for k in ("http", "https", "all"))
+
+# Gemeinsamer Client: Keep-Alive spart Verbindungsaufbau, DNS kommt aus dem Cache
+_client: httpx.Client | None = None
+_client_pid: int | None = None
+_client_lock = threading.Lock()
+
+def _get_client() -> httpx.Client:
+    # Pro Prozess ein eigener Client (Sockets nicht über fork() teilen)
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            # Mit HTTP(S)_PROXY löst der Proxy auf; eigener Transport würde die Env-Proxies abschalten
+            transport = None if _env_proxies() else _CachedDNSTransport()
+            _client = httpx.Client(transport=transport, follow_redirects=True, timeout=10.0)
+            _client_pid = os.getpid()
+        return _client
+
+# ---------- Helpers ----------
+def normalize_url(url: str) -> str:
+    """
+    Vereinheitlicht eine Target-URL als Cache-Schlüssel:
+    Schema ergänzen, Schema/Host klein, Default-Port und Fragment entfernen.
     """
-    findings = []
     url = url.strip()
-    if not url.startswith("http"):
+    if not url.lower().startswith(("http://", "https://")):
         url = "https://" + url
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    netloc = f"[{host}]" if ":" in host else host
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{parts.port}"
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+def resolve_host(host: str) -> List[str]:
+    """
+    Löst einen Hostnamen auf und cached das Ergebnis; der HTTP-Client
+    verbindet zu genau diesen Adressen (Reihenfolge von getaddrinfo).
+    Negative Antworten gelten nur DNS_NEGATIVE_TTL Sekunden, damit ein
+    kurzer Resolver-Ausfall nicht alle Targets des Hosts blockiert.
+    Leere Liste = nicht auflösbar.
+    """
+    cached = _dns_cache.get(host)
+    if cached is not _MISSING:
+        return cached
+    try:
+        infos = socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+        addrs = list(dict.fromkeys(info[4][0] for info in infos))
+    except (socket.gaierror, UnicodeError):
+        addrs = []
+    _dns_cache.set(host, addrs, ttl=None if addrs else settings.dns_negative_ttl)
+    return addrs
+
+def clear_caches():
+    _result_cache.clear()
+    _dns_cache.clear()
+
+# ---------- Scan ----------
+@dataclass
+class ScanResult:
+    url: str
+    findings: List[Dict] = field(default_factory=list)
+    status_code: Optional[int] = None
+    header_fail_mask: int = 0       # Bits fehlgeschlagener Header-Checks
+    header_checked_mask: int = 0    # Bits der ausgeführten Header-Checks
+    error: bool = False
+
+    def copy(self) -> "ScanResult":
+        return replace(self, findings=[dict(f) for f in self.findings])
+
+def _error(url: str, details: str) -> ScanResult:
+    return ScanResult(url, [{"title": "Scan error", "severity": "low", "details": details}], error=True)
+
+def check_url(url: str) -> Tuple[ScanResult, Optional[str]]:
+    """
+    Request + Header-Checks ohne Cache/Limiter; läuft auch in Worker-Prozessen.
+    Rückgabe: (Ergebnis, Retry-After-Header).
+    """
     try:
-        with httpx.Client(follow_redirects=True, timeout=10.0) as client:
-            r = client.get(url)
-            headers = {k.lower(): v for k, v in r.headers.items()}
-
-            # Erreichbarkeit hinzufügen
-            findings.append({
-                "title": f"Reachability: {r.status_code}",
-                "severity": "info",
-                "details": f"URL={url}, server={headers.get('server','?')}"
-            })
-
-            # Fehlende Security-Header melden
-            missing = [h for h in SEC_HEADERS if h not in headers]
-            if missing:
-                findings.append({
-                    "title": "Missing security headers",
-                    "severity": "medium",
-                    "details": ", ".join(missing)
-                })
+        r = _get_client().get(url)
     except Exception as e:
-        findings.append({
-            "title": "Scan error",
+        return _error(url, str(e)), None
+    headers = {k.lower(): v for k, v in r.headers.items()}
+    failed, checked = header_checks.evaluate(headers, r.headers.get_list("set-cookie"))
+    res = ScanResult(url, status_code=r.status_code,
+                     header_fail_mask=failed, header_checked_mask=checked)
+
+    # Erreichbarkeit hinzufügen
+    res.findings.append({
+        "title": f"Reachability: {r.status_code}",
+        "severity": "info",
+        "details": f"URL={url}, server={headers.get('server','?')}"
+    })
+
+    # Fehlende Security-Header melden
+    missing = header_checks.mask_names(failed, kind="presence")
+    if missing:
+        res.findings.append({
+            "title": "Missing security headers",
+            "severity": "medium",
+            "details": ", ".join(missing)
+        })
+    # Schwache Header-/Cookie-Konfiguration
+    weak = [n for n in header_checks.mask_names(failed) if n not in missing]
+    if weak:
+        res.findings.append({
+            "title": "Weak security header configuration",
             "severity": "low",
-            "details": str(e)
+            "details": ", ".join(weak)
         })
-    return findings
+    return res, headers.get("retry-after")
+
+def _cacheable(res: ScanResult) -> bool:
+    """Fehlschläge, Drosselung (429/503) und 5xx nicht cachen, damit Retries wirklich neu scannen."""
+    code = res.status_code
+    return not res.error and code is not None and code < 500 and code not in BACKOFF_STATUS
+
+def _fetch(url: str, platform=None, executor: Optional[Executor] = None,
+           reserved: bool = False) -> ScanResult:
+    host = urlsplit(url).hostname or ""
+    keys = limiter.keys_for(url, platform)
+    if not resolve_host(host):
+        if reserved:
+            limiter.refund(keys)
+        return _error(url, f"DNS: {host} nicht auflösbar")
+    if not reserved:
+        limiter.acquire(keys, timeout=settings.rate_limit_max_wait)
+    if executor is None:
+        res, retry_after = check_url(url)
+    else:
+        res, retry_after = executor.submit(check_url, url).result()
+    if res.status_code is not None:
+        limiter.feedback(keys, res.status_code, retry_after)
+    return res
+
+def scan(url: str, platform=None, executor: Optional[Executor] = None,
+         reserved: bool = False) -> ScanResult:
+    """
+    Führt einen sicheren, Low-Impact Scan durch:
+    - Prüft Erreichbarkeit (HTTP-Status)
+    - Führt die registrierten Header-Checks aus (siehe header_checks)
+    Ergebnisse werden je normalisierter URL gecached; parallele Scans
+    derselben URL teilen sich einen Request.
+    Jeder Request braucht ein Token vom Host-/Plattform-Limiter; gibt es
+    keines innerhalb von RATE_LIMIT_MAX_WAIT, wird RateLimited geworfen.
+    `reserved=True`: der Aufrufer hat das Token bereits per
+    limiter.try_acquire() genommen; ohne Request (Cache-Treffer, geteilter
+    Request, DNS-Fehler) geht es per limiter.refund() zurück.
+    Mit `executor` (z.B. ProcessPoolExecutor) läuft der eigentliche
+    Request dort; Cache und Limiter bleiben im aufrufenden Prozess.
+    """
+    try:
+        key = normalize_url(url)
+    except ValueError as e:
+        # kaputte Target-URL (z.B. "example.com:abc") -> Finding statt Exception
+        if reserved:
+            limiter.refund(limiter.keys_for(url, platform))
+        return _error(url, str(e))
+    with _inflight_lock:
+        cached = _result_cache.get(key)
+        if cached is not _MISSING:
+            if reserved:
+                limiter.refund(limiter.keys_for(key, platform))
+            return cached.copy()
+        fut = _inflight.get(key)
+        owner = fut is None
+        if owner:
+            fut = Future()
+            _inflight[key] = fut
+    if not owner:
+        if reserved:
+            limiter.refund(limiter.keys_for(key, platform))
+        return fut.result().copy()
+
+    try:
+        res = _fetch(key, platform, executor, reserved)
+        if _cacheable(res):
+            _result_cache.set(key, res)
+        fut.set_result(res)
+    except BaseException as e:
+        fut.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+    return res.copy()
+
+def scan_target(url: str, platform=None) -> List[Dict]:
+    """Wie scan(), liefert aber nur die Findings."""
+    return scan(url, platform).findings
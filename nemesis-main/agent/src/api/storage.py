@@ -1,19 +1,188 @@
+import os
+import queue
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Iterable, List, Tuple, Optional
 from datetime import datetime, timedelta, timezone
 
-DB_PATH = Path("/data/nemesis.db")
+from .config import settings
+from .logging_conf import get_logger
 
-def _conn():
+logger = get_logger()
+
+# log_job-Level (historisch "WARN") -> loguru-Level
+_LOG_LEVELS = {"WARN": "WARNING"}
+
+DB_PATH = Path(os.getenv("NEMESIS_DB_PATH", "/data/nemesis.db"))
+
+# Bei jeder Schema-Änderung in init_db() erhöhen
+SCHEMA_VERSION = 3
+
+# Eine Schreib-Verbindung pro Prozess (serialisiert), Lesen über einen Pool
+# von read-only Verbindungen. WAL sorgt dafür, dass Leser nie auf den
+# Schreiber warten; Checkpoints übernimmt ein eigener Thread in Schreibpausen.
+_writer: Optional[sqlite3.Connection] = None
+_writer_lock = threading.RLock()
+# Nur für Öffnen/Neuaufbau nach fork(); Leser nehmen nie _writer_lock
+_open_lock = threading.Lock()
+_writer_pid: Optional[int] = None
+_readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+_writes_since_checkpoint = 0
+_last_write = 0.0
+_checkpointer: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+def _open_writer() -> sqlite3.Connection:
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, isolation_level=None, check_same_thread=False,
+                           timeout=settings.db_busy_timeout_ms / 1000)
     conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    # Automatische Checkpoints aus: sie liefen sonst mitten im Schreib-Burst
+    conn.execute("PRAGMA wal_autocheckpoint=0;")
+    return conn
+
+def _open_reader() -> sqlite3.Connection:
+    conn = sqlite3.connect(f"{DB_PATH.resolve().as_uri()}?mode=ro", uri=True, isolation_level=None,
+                           check_same_thread=False, timeout=settings.db_busy_timeout_ms / 1000)
+    conn.execute("PRAGMA query_only=ON;")
     return conn
 
-def init_db():
-    with _conn() as conn:
+def _ensure_writer() -> sqlite3.Connection:
+    """Öffnet die Schreib-Verbindung (auch nach fork() neu) und startet den Checkpointer."""
+    global _writer, _writer_pid, _checkpointer, _readers
+    pid = os.getpid()
+    writer = _writer
+    if writer is not None and _writer_pid == pid:
+        return writer
+    with _open_lock:
+        if _writer is None or _writer_pid != pid:
+            _readers = queue.LifoQueue()
+            _writer = _open_writer()
+            _writer_pid = pid
+            _stop.clear()
+            _checkpointer = threading.Thread(target=_checkpoint_loop, name="sqlite-checkpoint", daemon=True)
+            _checkpointer.start()
+        return _writer
+
+@contextmanager
+def _write():
+    """
+    Schreib-Transaktion auf der einzigen Writer-Verbindung.
+    Commit beim Verlassen, Rollback bei Exception.
+    """
+    global _writes_since_checkpoint, _last_write
+    with _writer_lock:
+        conn = _ensure_writer()
         c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            yield c
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+        finally:
+            _writes_since_checkpoint += 1
+            _last_write = time.monotonic()
+
+@contextmanager
+def _read():
+    """
+    Read-only Verbindung aus dem Pool (mode=ro, query_only). Wartet nie auf
+    eine offene Schreib-Transaktion; _ensure_writer() nur für DB-Datei/fork().
+    """
+    _ensure_writer()
+    try:
+        conn = _readers.get_nowait()
+    except queue.Empty:
+        conn = _open_reader()
+    try:
+        yield conn
+    finally:
+        if _readers.qsize() < settings.db_read_pool_size:
+            _readers.put(conn)
+        else:
+            conn.close()
+
+def checkpoint(mode: str = "PASSIVE", busy_ms: Optional[int] = None) -> Tuple[int, int, int]:
+    """
+    WAL-Checkpoint über die Writer-Verbindung: (busy, wal_pages, checkpointed).
+    RESTART/TRUNCATE warten über den Busy-Handler auf Leser und halten dabei
+    _writer_lock; `busy_ms` begrenzt diese Wartezeit.
+    """
+    global _writes_since_checkpoint
+    with _writer_lock:
+        conn = _ensure_writer()
+        if busy_ms is not None:
+            conn.execute(f"PRAGMA busy_timeout={int(busy_ms)};")
+        try:
+            row = conn.execute(f"PRAGMA wal_checkpoint({mode});").fetchone()
+        finally:
+            if busy_ms is not None:
+                conn.execute(f"PRAGMA busy_timeout={settings.db_busy_timeout_ms};")
+        _writes_since_checkpoint = 0
+        return tuple(row)
+
+# Höchstens so lange (ms) wartet ein TRUNCATE-Checkpoint auf aktive Leser
+_TRUNCATE_BUSY_MS = 50
+
+def _checkpoint_loop():
+    """
+    PASSIVE-Checkpoint, sobald der Writer kurz ruht oder zu viele Writes
+    aufgelaufen sind; TRUNCATE nur in Ruhephasen und bei großem WAL.
+    """
+    interval = settings.db_checkpoint_idle_ms / 1000
+    while not _stop.wait(interval):
+        if not _writes_since_checkpoint:
+            continue
+        idle = time.monotonic() - _last_write >= interval
+        if not idle and _writes_since_checkpoint < settings.db_checkpoint_writes:
+            continue
+        try:
+            _, wal_pages, done = checkpoint("PASSIVE")
+            if idle and wal_pages >= settings.db_wal_truncate_pages and done == wal_pages:
+                # kurzer Busy-Timeout: lange Dashboard-Reads sollen keine Writer blockieren;
+                # klappt es nicht, folgt der nächste Versuch in der nächsten Ruhephase
+                checkpoint("TRUNCATE", busy_ms=_TRUNCATE_BUSY_MS)
+        except sqlite3.Error:
+            pass
+
+def close():
+    """Checkpoint + alle Verbindungen schließen (z.B. beim Shutdown)."""
+    global _writer
+    _stop.set()
+    while True:
+        try:
+            _readers.get_nowait().close()
+        except queue.Empty:
+            break
+    with _writer_lock, _open_lock:
+        if _writer is not None and _writer_pid == os.getpid():
+            try:
+                _writer.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+            except sqlite3.Error:
+                pass
+            _writer.close()
+        _writer = None
+
+def schema_version() -> int:
+    with _read() as conn:
+        return conn.execute("PRAGMA user_version;").fetchone()[0]
+
+def init_db() -> bool:
+    """
+    Legt das Schema an. Stimmt PRAGMA user_version bereits mit
+    SCHEMA_VERSION überein, wird die DDL übersprungen (schneller Start).
+    Rückgabe: True, wenn DDL ausgeführt wurde.
+    """
+    if schema_version() == SCHEMA_VERSION:
+        return False
+    with _write() as c:
         # Rules
         c.execute("""
 CREATE TABLE IF NOT EXISTS rules_shadow(
@@ -66,6 +235,20 @@ CREATE TABLE IF NOT EXISTS bounty_targets(
   created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
   FOREIGN KEY(platform_id) REFERENCES bounty_platforms(id)
 )""")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_targets_status ON bounty_targets(status, id)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_targets_platform ON bounty_targets(platform_id, target)")
+        # Letztes Scan-Ergebnis je Target (Header-Checks als Bitmaske)
+        c.execute("""
+CREATE TABLE IF NOT EXISTS scan_results(
+  target_id INTEGER PRIMARY KEY,
+  url TEXT NOT NULL,
+  status_code INTEGER,
+  header_fail_mask INTEGER NOT NULL DEFAULT 0,
+  header_checked_mask INTEGER NOT NULL DEFAULT 0,
+  scanned_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  FOREIGN KEY(target_id) REFERENCES bounty_targets(id)
+)""")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_scan_results_masks ON scan_results(header_fail_mask, header_checked_mask)")
         # Module Status
         c.execute("""
 CREATE TABLE IF NOT EXISTS modules_status(
@@ -84,108 +267,128 @@ CREATE TABLE IF NOT EXISTS workers(
   last_heartbeat DATETIME,
   created_at DATETIME DEFAULT CURRENT_TIMESTAMP
 )""")
-        conn.commit()
+        # Scheduler-Leader-Lease (ein Eintrag je Lease-Name)
+        c.execute("""
+CREATE TABLE IF NOT EXISTS scheduler_lease(
+  name TEXT PRIMARY KEY,
+  holder TEXT NOT NULL,
+  expires_at REAL NOT NULL            -- Unix-Zeit (Sekunden)
+)""")
+        # Manuelle Job-Auslöser anderer Prozesse, abgearbeitet vom Leader
+        c.execute("""
+CREATE TABLE IF NOT EXISTS job_requests(
+  job TEXT PRIMARY KEY,
+  requested_at REAL NOT NULL          -- Unix-Zeit (Sekunden)
+)""")
+        c.execute(f"PRAGMA user_version={SCHEMA_VERSION};")
+    return True
 
 # --- Rules / Findings / Jobs ---
 def add_shadow_rule(pattern: str) -> int:
-    with _conn() as conn:
-        c = conn.cursor()
+    with _write() as c:
         c.execute("INSERT INTO rules_shadow(pattern) VALUES(?)", (pattern,))
-        conn.commit()
         return c.lastrowid
 
 def get_latest_shadow_rule_id() -> Optional[int]:
-    with _conn() as conn:
+    with _read() as conn:
         c = conn.cursor()
         row = c.execute("SELECT id FROM rules_shadow ORDER BY id DESC LIMIT 1").fetchone()
         return row[0] if row else None
 
 def list_recent_shadow_ids(limit: int = 10) -> List[int]:
-    with _conn() as conn:
+    with _read() as conn:
         c = conn.cursor()
         rows = c.execute("SELECT id FROM rules_shadow ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
         return [r[0] for r in rows]
 
 def promote_shadow_to_live(rule_id: int) -> Optional[int]:
-    with _conn() as conn:
-        c = conn.cursor()
+    with _write() as c:
         row = c.execute("SELECT pattern FROM rules_shadow WHERE id=?", (rule_id,)).fetchone()
         if not row:
             return None
         pattern = row[0]
         c.execute("INSERT INTO rules_live(pattern) VALUES(?)", (pattern,))
-        conn.commit()
         return c.lastrowid
 
 def add_finding(title: str, severity: str, details: str = "") -> int:
-    with _conn() as conn:
-        c = conn.cursor()
+    with _write() as c:
         c.execute("INSERT INTO findings(title,severity,details) VALUES(?,?,?)", (title, severity, details))
-        conn.commit()
         return c.lastrowid
 
 def log_job(job: str, level: str, msg: str):
-    with _conn() as conn:
-        c = conn.cursor()
-        c.execute("INSERT INTO jobs_log(job,level,msg) VALUES(?,?,?)", (job, level, msg))
-        conn.commit()
+    """
+    Job-Meldung über die Logging-Pipeline; der Sink schreibt sie gebündelt
+    nach jobs_log (und in Konsole/Datei).
+    """
+    logger.opt(depth=1).bind(job=job, job_level=level).log(_LOG_LEVELS.get(level, level), msg)
+
+def add_job_logs(rows: Iterable[Tuple[str, str, str, str]]):
+    """Batch-Insert (job, level, msg, created_at) für den Log-Sink."""
+    with _write() as c:
+        c.executemany("INSERT INTO jobs_log(job,level,msg,created_at) VALUES(?,?,?,?)", rows)
 
 def recent_findings(limit: int = 25) -> List[Tuple]:
-    with _conn() as conn:
+    with _read() as conn:
         c = conn.cursor()
         return c.execute("SELECT id,title,severity,details,created_at FROM findings ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
 
 def list_rules(limit: int = 50):
-    with _conn() as conn:
+    with _read() as conn:
         c = conn.cursor()
         shadow = c.execute("SELECT id,pattern,created_at FROM rules_shadow ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
         live   = c.execute("SELECT id,pattern,created_at FROM rules_live ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
         return shadow, live
 
 def recent_jobs(limit: int = 50):
-    with _conn() as conn:
+    with _read() as conn:
         c = conn.cursor()
         return c.execute("SELECT id,job,level,msg,created_at FROM jobs_log ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
 
 # --- Bounty Platforms / Targets ---
 def upsert_platform(name: str, base_url: str | None, api_key: str | None, enabled: bool = True) -> int:
-    with _conn() as conn:
-        c = conn.cursor()
+    with _write() as c:
         row = c.execute("SELECT id FROM bounty_platforms WHERE name=?", (name,)).fetchone()
         if row:
             c.execute("UPDATE bounty_platforms SET base_url=?, api_key=?, enabled=?, created_at=CURRENT_TIMESTAMP WHERE id=?",
                       (base_url, api_key, 1 if enabled else 0, row[0]))
-            conn.commit()
             return row[0]
         c.execute("INSERT INTO bounty_platforms(name, base_url, api_key, enabled) VALUES(?,?,?,?)",
                   (name, base_url, api_key, 1 if enabled else 0))
-        conn.commit()
         return c.lastrowid
 
 def list_platforms():
-    with _conn() as conn:
+    with _read() as conn:
         c = conn.cursor()
         return c.execute("SELECT id,name,base_url,enabled,created_at FROM bounty_platforms ORDER BY id DESC").fetchall()
 
 def set_platform_enabled(pid: int, enabled: bool):
-    with _conn() as conn:
-        c = conn.cursor()
+    with _write() as c:
         c.execute("UPDATE bounty_platforms SET enabled=? WHERE id=?", (1 if enabled else 0, pid))
-        conn.commit()
 
 def add_or_queue_target(platform_id: int, target: str, scope: str | None = None):
-    with _conn() as conn:
-        c = conn.cursor()
+    with _write() as c:
         row = c.execute("SELECT id FROM bounty_targets WHERE platform_id=? AND target=?", (platform_id, target)).fetchone()
         if row:
             return row[0]
         c.execute("INSERT INTO bounty_targets(platform_id,target,scope,status) VALUES(?,?,?,'queued')",
                   (platform_id, target, scope))
-        conn.commit()
         return c.lastrowid
 
+def queue_targets_bulk(platform_id: int, targets: Iterable[str], scope: str | None = None) -> int:
+    """Reiht viele Targets in einer Transaktion ein (ohne Duplikat-Prüfung)."""
+    with _write() as c:
+        c.executemany("INSERT INTO bounty_targets(platform_id,target,scope,status) VALUES(?,?,?,'queued')",
+                      ((platform_id, t, scope) for t in targets))
+        return c.rowcount
+
+def count_queued_targets() -> int:
+    with _read() as conn:
+        c = conn.cursor()
+        row = c.execute("SELECT COUNT(*) FROM bounty_targets WHERE status='queued'").fetchone()
+        return row[0] if row else 0
+
 def list_targets(limit: int = 50):
-    with _conn() as conn:
+    with _read() as conn:
         c = conn.cursor()
         return c.execute("""
 SELECT t.id, p.name, t.target, t.scope, t.status, t.last_scanned_at, t.created_at
@@ -194,46 +397,85 @@ LEFT JOIN bounty_platforms p ON p.id=t.platform_id
 ORDER BY t.id DESC LIMIT ?
 """, (limit,)).fetchall()
 
-def pop_next_queued_target() -> Optional[tuple]:
-    with _conn() as conn:
-        c = conn.cursor()
-        row = c.execute("SELECT id,platform_id,target,scope FROM bounty_targets WHERE status='queued' ORDER BY id ASC LIMIT 1").fetchone()
+def pop_next_queued_target(exclude: Iterable[int] = ()) -> Optional[tuple]:
+    exclude = list(exclude)
+    skip = f" AND id NOT IN ({','.join('?' * len(exclude))})" if exclude else ""
+    # Lesen + Markieren in einer Schreib-Transaktion, parallele Jobs bekommen verschiedene Targets
+    with _write() as c:
+        row = c.execute("SELECT id,platform_id,target,scope FROM bounty_targets WHERE status='queued'" + skip +
+                        " ORDER BY id ASC LIMIT 1", exclude).fetchone()
         if not row:
             return None
         c.execute("UPDATE bounty_targets SET status='scanning' WHERE id=?", (row[0],))
-        conn.commit()
         return row
 
+def release_target(tid: int):
+    """Gibt ein gepopptes Target unverändert in die Queue zurück."""
+    with _write() as c:
+        c.execute("UPDATE bounty_targets SET status='queued' WHERE id=? AND status='scanning'", (tid,))
+
+def requeue_scanning_targets() -> int:
+    """
+    Setzt alle Targets in 'scanning' zurück auf 'queued'. Nur beim Leader-Wechsel
+    aufrufen: gescannt wird ausschließlich im Leader, ein neuer Leader übernimmt
+    so die Targets, die sein abgestürzter Vorgänger gepoppt hatte.
+    """
+    with _write() as c:
+        c.execute("UPDATE bounty_targets SET status='queued' WHERE status='scanning'")
+        return c.rowcount
+
 def mark_target_scanned(tid: int, ok: bool, when: str):
-    with _conn() as conn:
-        c = conn.cursor()
+    with _write() as c:
         new_status = 'scanned' if ok else 'error'
         c.execute("UPDATE bounty_targets SET status=?, last_scanned_at=? WHERE id=?", (new_status, when, tid))
-        conn.commit()
+
+def save_scan_result(tid: int, url: str, status_code: Optional[int], fail_mask: int, checked_mask: int):
+    with _write() as c:
+        c.execute("INSERT INTO scan_results(target_id,url,status_code,header_fail_mask,header_checked_mask,scanned_at) "
+                  "VALUES(?,?,?,?,?,CURRENT_TIMESTAMP) "
+                  "ON CONFLICT(target_id) DO UPDATE SET url=excluded.url, status_code=excluded.status_code, "
+                  "header_fail_mask=excluded.header_fail_mask, header_checked_mask=excluded.header_checked_mask, "
+                  "scanned_at=CURRENT_TIMESTAMP",
+                  (tid, url, status_code, fail_mask, checked_mask))
+
+def header_mask_counts() -> List[Tuple[int, int, int]]:
+    """
+    (fail_mask, checked_mask, anzahl) je Kombination. Läuft als reiner
+    Index-Scan; die Zahl der Kombinationen ist klein, auch bei Millionen Targets.
+    """
+    with _read() as conn:
+        c = conn.cursor()
+        return c.execute("SELECT header_fail_mask, header_checked_mask, COUNT(*) FROM scan_results "
+                         "GROUP BY header_fail_mask, header_checked_mask").fetchall()
+
+def count_targets_failing(mask: int) -> int:
+    """Anzahl Targets, die alle Checks in `mask` nicht bestanden haben."""
+    with _read() as conn:
+        c = conn.cursor()
+        row = c.execute("SELECT COUNT(*) FROM scan_results WHERE header_fail_mask & ? = ?", (mask, mask)).fetchone()
+        return row[0] if row else 0
 
 # --- Module status helpers ---
 def set_module_status(module: str, status: str, message: str = ""):
-    with _conn() as conn:
-        c = conn.cursor()
+    with _write() as c:
         c.execute("INSERT INTO modules_status(module,status,message,updated_at) VALUES(?,?,?,CURRENT_TIMESTAMP) "
                   "ON CONFLICT(module) DO UPDATE SET status=excluded.status, message=excluded.message, updated_at=CURRENT_TIMESTAMP",
                   (module, status, message))
-        conn.commit()
 
 def get_all_module_status():
-    with _conn() as conn:
+    with _read() as conn:
         c = conn.cursor()
         return c.execute("SELECT module,status,message,updated_at FROM modules_status ORDER BY module ASC").fetchall()
 
 # --- Metrics ---
 def count_running_scans() -> int:
-    with _conn() as conn:
+    with _read() as conn:
         c = conn.cursor()
         row = c.execute("SELECT COUNT(*) FROM bounty_targets WHERE status='scanning'").fetchone()
         return row[0] if row else 0
 
 def research_progress() -> dict:
-    with _conn() as conn:
+    with _read() as conn:
         c = conn.cursor()
         total = c.execute("SELECT COUNT(*) FROM bounty_targets").fetchone()[0]
         scanned = c.execute("SELECT COUNT(*) FROM bounty_targets WHERE status IN ('scanned','error')").fetchone()[0]
@@ -243,47 +485,85 @@ def research_progress() -> dict:
 # --- Workers ---
 def register_worker(name: str, token: str):
     now = datetime.now(timezone.utc).isoformat()
-    with _conn() as conn:
-        c = conn.cursor()
+    with _write() as c:
         row = c.execute("SELECT id FROM workers WHERE name=?", (name,)).fetchone()
         if row:
             c.execute("UPDATE workers SET token=?, status='online', last_heartbeat=? WHERE id=?", (token, now, row[0]))
-            conn.commit()
             return row[0]
         c.execute("INSERT INTO workers(name, token, status, last_heartbeat) VALUES(?,?, 'online', ?)",
                   (name, token, now))
-        conn.commit()
         return c.lastrowid
 
 def heartbeat_worker(name: str, token: str) -> bool:
     now = datetime.now(timezone.utc).isoformat()
-    with _conn() as conn:
-        c = conn.cursor()
+    with _write() as c:
         row = c.execute("SELECT id, token FROM workers WHERE name=?", (name,)).fetchone()
         if not row:
             return False
         if row[1] != token:
             return False
         c.execute("UPDATE workers SET status='online', last_heartbeat=? WHERE id=?", (now, row[0]))
-        conn.commit()
         return True
 
 def list_workers():
-    with _conn() as conn:
+    with _read() as conn:
         c = conn.cursor()
         return c.execute("SELECT id,name,status,last_heartbeat,created_at FROM workers ORDER BY id DESC").fetchall()
 
 def count_workers_online(minutes: int = 5) -> int:
     cutoff = (datetime.now(timezone.utc) - timedelta(minutes=minutes)).isoformat()
-    with _conn() as conn:
+    with _read() as conn:
         c = conn.cursor()
         row = c.execute("SELECT COUNT(*) FROM workers WHERE status='online' AND (last_heartbeat IS NOT NULL AND last_heartbeat >= ?)", (cutoff,)).fetchone()
         return row[0] if row else 0
 
 def mark_stale_workers_offline(minutes: int = 5) -> int:
     cutoff = (datetime.now(timezone.utc) - timedelta(minutes=minutes)).isoformat()
-    with _conn() as conn:
-        c = conn.cursor()
+    with _write() as c:
         c.execute("UPDATE workers SET status='offline' WHERE last_heartbeat IS NULL OR last_heartbeat < ?", (cutoff,))
-        conn.commit()
         return c.rowcount
+
+# --- Scheduler leader lease ---
+def acquire_lease(name: str, holder: str, ttl: float) -> bool:
+    """
+    Holt oder verlängert die Lease `name` für `holder`. Gelingt nur, wenn
+    sie frei, abgelaufen oder bereits unsere ist.
+    """
+    now = time.time()
+    with _write() as c:
+        c.execute("INSERT INTO scheduler_lease(name,holder,expires_at) VALUES(?,?,?) "
+                  "ON CONFLICT(name) DO UPDATE SET holder=excluded.holder, expires_at=excluded.expires_at "
+                  "WHERE scheduler_lease.holder=excluded.holder OR scheduler_lease.expires_at < ?",
+                  (name, holder, now + ttl, now))
+        row = c.execute("SELECT holder FROM scheduler_lease WHERE name=?", (name,)).fetchone()
+        return bool(row) and row[0] == holder
+
+def release_lease(name: str, holder: str):
+    with _write() as c:
+        c.execute("DELETE FROM scheduler_lease WHERE name=? AND holder=?", (name, holder))
+
+def get_lease(name: str) -> Optional[tuple]:
+    with _read() as conn:
+        c = conn.cursor()
+        return c.execute("SELECT holder, expires_at FROM scheduler_lease WHERE name=?", (name,)).fetchone()
+
+# --- Job requests (Nicht-Leader -> Leader) ---
+def request_job(job: str):
+    """Merkt einen Job für den Leader vor; mehrfache Anfragen fallen zusammen."""
+    with _write() as c:
+        c.execute("INSERT INTO job_requests(job,requested_at) VALUES(?,?) "
+                  "ON CONFLICT(job) DO NOTHING", (job, time.time()))
+
+def take_job_requests() -> List[str]:
+    """
+    Liefert und löscht alle vorgemerkten Jobs (älteste zuerst). Läuft alle
+    JOB_REQUEST_POLL Sekunden, daher erst lesend prüfen und nur bei
+    vorhandenen Einträgen eine Schreib-Transaktion öffnen.
+    """
+    with _read() as conn:
+        if conn.execute("SELECT 1 FROM job_requests LIMIT 1").fetchone() is None:
+            return []
+    with _write() as c:
+        rows = c.execute("SELECT job FROM job_requests ORDER BY requested_at ASC, rowid ASC").fetchall()
+        c.execute("DELETE FROM job_requests")
+        return [r[0] for r in rows]
@@ -0,0 +1,25 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Settings werden beim Import gelesen -> Pfade vor dem ersten Import umbiegen
+_TMP = tempfile.mkdtemp(prefix="nemesis-tests-")
+os.environ.setdefault("NEMESIS_DB_PATH", os.path.join(_TMP, "nemesis.db"))
+os.environ.setdefault("LOG_FILE", os.path.join(_TMP, "nemesis.log"))
+os.environ.setdefault("AI_PROVIDER", "none")
+
+# Paket liegt als agent.src.api unter nemesis-main/
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import pytest  # noqa: E402
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Frische SQLite-DB je Test; liefert das storage-Modul."""
+    from agent.src.api import storage
+    storage.close()
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "test.db")
+    storage.init_db()
+    yield storage
+    storage.close()
@@ -0,0 +1,80 @@
+import pytest
+
+from agent.src.api import header_checks
+from agent.src.api.header_checks import CHECKS, evaluate, mask_names
+
+# Bits sind in scan_results persistiert und dürfen sich nie ändern
+EXPECTED_BITS = {
+    "x-content-type-options": 0,
+    "content-security-policy": 1,
+    "x-frame-options": 2,
+    "referrer-policy": 3,
+    "permissions-policy": 4,
+    "strict-transport-security": 5,
+    "hsts-max-age": 6,
+    "csp-no-unsafe-inline": 7,
+    "csp-frame-ancestors": 8,
+    "x-content-type-nosniff": 9,
+    "cookie-secure": 10,
+    "cookie-httponly": 11,
+    "cookie-samesite": 12,
+}
+
+HARDENED = {
+    "x-content-type-options": "nosniff",
+    "content-security-policy": "default-src 'self'; frame-ancestors 'none'",
+    "x-frame-options": "DENY",
+    "referrer-policy": "no-referrer",
+    "permissions-policy": "geolocation=()",
+    "strict-transport-security": "max-age=31536000; includeSubDomains",
+}
+
+def _bits(*names):
+    mask = 0
+    for n in names:
+        mask |= 1 << EXPECTED_BITS[n]
+    return mask
+
+def test_bit_layout_is_stable():
+    assert {name: c.bit for name, c in CHECKS.items()} == EXPECTED_BITS
+
+def test_register_check_rejects_taken_bit():
+    with pytest.raises(ValueError):
+        header_checks.register_check("dup", 0)(lambda h, c: True)
+    assert "dup" not in CHECKS
+
+def test_register_check_rejects_out_of_range_bit():
+    with pytest.raises(ValueError):
+        header_checks.register_check("too-high", 63)
+
+def test_hardened_response_passes_everything():
+    failed, checked = evaluate(HARDENED, ["sid=1; Secure; HttpOnly; SameSite=Lax"])
+    assert failed == 0
+    assert checked == _bits(*EXPECTED_BITS)
+
+def test_no_headers_only_fails_presence_checks():
+    failed, checked = evaluate({}, [])
+    presence = _bits(*header_checks.SEC_HEADERS)
+    assert failed == presence
+    assert checked == presence
+
+def test_value_checks_fail_on_weak_values():
+    headers = dict(HARDENED, **{
+        "strict-transport-security": "max-age=300",
+        "content-security-policy": "script-src 'self' 'unsafe-inline'",
+        "x-content-type-options": "yes",
+    })
+    failed, _ = evaluate(headers, [])
+    assert mask_names(failed) == ["hsts-max-age", "csp-no-unsafe-inline",
+                                  "csp-frame-ancestors", "x-content-type-nosniff"]
+
+def test_cookie_checks():
+    failed, checked = evaluate(HARDENED, ["a=1; Secure; HttpOnly; SameSite=Strict", "b=2; Path=/"])
+    assert checked & _bits("cookie-secure", "cookie-httponly", "cookie-samesite")
+    assert mask_names(failed, kind="cookie") == ["cookie-secure", "cookie-httponly", "cookie-samesite"]
+
+def test_enabled_checks_respects_setting(monkeypatch):
+    monkeypatch.setattr(header_checks.settings, "header_checks", "hsts-max-age, x-frame-options, unknown")
+    failed, checked = evaluate({}, [])
+    assert checked == _bits("x-frame-options")
+    assert failed == _bits("x-frame-options")
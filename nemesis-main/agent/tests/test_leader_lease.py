@@ -0,0 +1,51 @@
+def test_lease_is_exclusive(db):
+    assert db.acquire_lease("scheduler", "a", ttl=30)
+    assert not db.acquire_lease("scheduler", "b", ttl=30)
+    assert db.get_lease("scheduler")[0] == "a"
+
+def test_holder_can_renew(db):
+    assert db.acquire_lease("scheduler", "a", ttl=30)
+    first = db.get_lease("scheduler")[1]
+    assert db.acquire_lease("scheduler", "a", ttl=60)
+    assert db.get_lease("scheduler")[1] > first
+
+def test_expired_lease_can_be_taken_over(db):
+    assert db.acquire_lease("scheduler", "a", ttl=-1)
+    assert db.acquire_lease("scheduler", "b", ttl=30)
+    assert db.get_lease("scheduler")[0] == "b"
+    assert not db.acquire_lease("scheduler", "a", ttl=30)
+
+def test_release_only_by_holder(db):
+    assert db.acquire_lease("scheduler", "a", ttl=30)
+    db.release_lease("scheduler", "b")
+    assert db.get_lease("scheduler")[0] == "a"
+    db.release_lease("scheduler", "a")
+    assert db.get_lease("scheduler") is None
+    assert db.acquire_lease("scheduler", "b", ttl=30)
+
+def test_leases_are_independent_per_name(db):
+    assert db.acquire_lease("scheduler", "a", ttl=30)
+    assert db.acquire_lease("other", "b", ttl=30)
+
+def test_job_requests_collapse(db):
+    db.request_job("scan_queue")
+    db.request_job("scan_queue")
+    db.request_job("bounty_refresh")
+    assert db.take_job_requests() == ["scan_queue", "bounty_refresh"]
+    assert db.take_job_requests() == []
+
+def test_requeue_scanning_targets_after_failover(db):
+    pid = db.upsert_platform("p", None, None)
+    db.queue_targets_bulk(pid, ["a.example", "b.example", "c.example"])
+    popped = [db.pop_next_queued_target(), db.pop_next_queued_target()]
+    db.mark_target_scanned(popped[0][0], True, "2026-01-01T00:00:00+00:00")
+    assert db.count_running_scans() == 1
+    assert db.requeue_scanning_targets() == 1
+    assert db.count_running_scans() == 0
+    assert db.count_queued_targets() == 2
+
+def test_empty_job_request_poll_does_not_write(db, monkeypatch):
+    def no_write():
+        raise AssertionError("write transaction opened")
+    monkeypatch.setattr(db, "_write", no_write)
+    assert db.take_job_requests() == []
@@ -0,0 +1,68 @@
+import pytest
+
+from agent.src.api import logging_conf
+from agent.src.api.logging_conf import LogFilter, _parse_sample, logger
+
+def _record(msg="hello", level="INFO", job=None, name="agent.src.api.jobs"):
+    extra = {"job": job} if job else {}
+    return {"level": logger.level(level), "message": msg, "extra": extra, "name": name}
+
+def test_parse_sample():
+    assert _parse_sample("scan_queue=0.1, threat_feed=2 ,bad,=1") == {"scan_queue": 0.1, "threat_feed": 1.0}
+    assert _parse_sample("") == {}
+
+def test_level_applies_to_plain_records_only():
+    f = LogFilter("WARNING", {}, repeat_window=0)
+    assert not f(_record(level="INFO"))
+    assert f(_record(level="INFO", job="scan_queue"))   # jobs_log bekommt sie trotzdem
+    assert f(_record(level="ERROR"))
+
+def test_sampling_is_deterministic_per_job():
+    f = LogFilter("DEBUG", {"scan_queue": 0.25}, repeat_window=0)
+    passed = [f(_record(f"m{i}", job="scan_queue")) for i in range(8)]
+    # Akkumulator startet bei 1.0: erste Zeile durch, danach jede vierte
+    assert passed == [True, False, False, True, False, False, False, True]
+    assert f.suppressed == 5
+    assert all(f(_record(f"o{i}", job="other")) for i in range(3))
+
+def test_warning_bypasses_sampling_and_repeat():
+    f = LogFilter("DEBUG", {"scan_queue": 0.0}, repeat_window=300)
+    for _ in range(3):
+        assert f(_record("boom", level="WARNING", job="scan_queue"))
+    assert f.suppressed == 0
+
+def test_repeat_window_suppresses_and_carries_count(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(logging_conf.time, "monotonic", lambda: now[0])
+    f = LogFilter("DEBUG", {}, repeat_window=10)
+    assert f(_record("No targets in queue", job="scan_queue"))
+    assert not f(_record("No targets in queue", job="scan_queue"))
+    assert not f(_record("No targets in queue", job="scan_queue"))
+    assert f(_record("something else", job="scan_queue"))
+    now[0] += 11
+    rec = _record("No targets in queue", job="scan_queue")
+    assert f(rec)
+    assert rec["extra"]["repeated"] == 2
+    assert f.suppressed == 2
+
+def test_job_logs_are_inserted_in_batches(db, monkeypatch):
+    batches = []
+    orig = db.add_job_logs
+
+    def add_job_logs(rows):
+        rows = list(rows)
+        batches.append(len(rows))
+        orig(rows)
+
+    monkeypatch.setattr(db, "add_job_logs", add_job_logs)
+    logging_conf.configure_logger()
+    for i in range(50):
+        db.log_job("batch_test", "INFO", f"row {i}")
+    db.log_job("batch_test", "WARN", "warned")
+    logging_conf.flush_logs()
+    assert sum(batches) == 51
+    assert len(batches) < 51
+    rows = [r for r in db.recent_jobs(100) if r[1] == "batch_test"]
+    assert len(rows) == 51
+    assert rows[0][2:4] == ("WARN", "warned")
+    assert rows[-1][3] == "row 0"
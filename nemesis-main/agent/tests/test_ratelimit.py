@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from agent.src.api.ratelimit import RateLimited, RateLimiter, TokenBucket, parse_retry_after, registrable_domain
+
+@pytest.mark.parametrize("host, expected", [
+    ("example.com", "example.com"),
+    ("api.shop.example.com", "example.com"),
+    ("API.Example.COM.", "example.com"),
+    ("api.shop.example.co.uk", "example.co.uk"),
+    ("example.co.uk", "example.co.uk"),
+    ("10.0.0.1", "10.0.0.1"),
+    ("::1", "::1"),
+    ("localhost", "localhost"),
+])
+def test_registrable_domain(host, expected):
+    assert registrable_domain(host) == expected
+
+def test_parse_retry_after_seconds():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after(" 1.5 ") == 1.5
+    assert parse_retry_after("-3") == 0.0
+
+@pytest.mark.parametrize("value", [None, "", "soon", "Mon, 99 Foo 2020"])
+def test_parse_retry_after_unusable(value):
+    assert parse_retry_after(value) == 0.0
+
+def test_parse_retry_after_http_date():
+    when = datetime.now(timezone.utc) + timedelta(seconds=90)
+    assert 85 <= parse_retry_after(format_datetime(when, usegmt=True)) <= 90
+    past = datetime.now(timezone.utc) - timedelta(hours=1)
+    assert parse_retry_after(format_datetime(past, usegmt=True)) == 0.0
+
+def test_bucket_burst_then_wait():
+    b = TokenBucket(rate=2.0, burst=2, min_rate=0.1)
+    now = b._last
+    for _ in range(2):
+        assert b.wait_time(now) == 0
+        b.take()
+    assert b.wait_time(now) == pytest.approx(0.5)
+    assert b.wait_time(now + 0.5) == 0
+
+def test_bucket_penalize_halves_rate_and_honours_retry_after():
+    b = TokenBucket(rate=4.0, burst=4, min_rate=0.5)
+    now = b._last
+    b.penalize(now, retry_after=10)
+    assert b.rate == 2.0
+    assert b.tokens == 0
+    assert b.wait_time(now + 1) == pytest.approx(9)
+    for _ in range(10):
+        b.penalize(now)
+    assert b.rate == 0.5
+
+def test_bucket_reward_recovers_up_to_max_rate():
+    b = TokenBucket(rate=10.0, burst=1, min_rate=1.0)
+    b.penalize(b._last)
+    assert b.rate == 5.0
+    b.reward()
+    assert b.rate == 6.0
+    for _ in range(10):
+        b.reward()
+    assert b.rate == 10.0
+
+def test_bucket_zero_rate_is_paused():
+    b = TokenBucket(rate=0, burst=5, min_rate=0.05)
+    assert b.wait_time(b._last) == float("inf")
+
+def test_limiter_needs_token_from_every_bucket():
+    lim = RateLimiter(host_rate=1.0, host_burst=1, platform_rate=100.0, platform_burst=100, min_rate=0.1)
+    keys = lim.keys_for("https://a.example.com/x", platform=7)
+    assert keys == ["host:example.com", "platform:7"]
+    assert lim.try_acquire(keys) == 0
+    # gleiche registrierbare Domain teilt sich den Bucket
+    assert lim.try_acquire(lim.keys_for("b.example.com", platform=7)) > 0
+    assert lim.try_acquire(lim.keys_for("other.org", platform=7)) == 0
+    with pytest.raises(RateLimited):
+        lim.acquire(keys, timeout=0)
+
+def test_limiter_feedback_penalizes_host_not_platform():
+    lim = RateLimiter(host_rate=4.0, host_burst=4, platform_rate=4.0, platform_burst=4, min_rate=0.1)
+    keys = lim.keys_for("example.com", platform=1)
+    lim.feedback(keys, 429, "30")
+    assert lim.wait_time(["host:example.com"]) > 25
+    assert lim.wait_time(["platform:1"]) == 0
+
+def test_limiter_refund_returns_reserved_token():
+    lim = RateLimiter(host_rate=0.01, host_burst=1, platform_rate=0.01, platform_burst=1, min_rate=0.01)
+    keys = lim.keys_for("example.com", platform=1)
+    assert lim.try_acquire(keys) == 0
+    assert lim.try_acquire(keys) > 0
+    lim.refund(keys)
+    assert lim.try_acquire(keys) == 0
+    lim.refund(keys)
+    lim.refund(keys)   # nie über burst
+    assert lim._buckets["host:example.com"].tokens == 1
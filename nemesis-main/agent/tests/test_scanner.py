@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+
+from agent.src.api import scanner
+from agent.src.api.ratelimit import RateLimiter
+from agent.src.api.scanner import ScanResult, TTLCache, normalize_url
+
+@pytest.fixture
+def fake_check(monkeypatch):
+    """Ersetzt den HTTP-Request; `calls` zählt echte Requests."""
+    scanner.clear_caches()
+    monkeypatch.setattr(scanner, "resolve_host", lambda host: ["127.0.0.1"])
+    monkeypatch.setattr(scanner, "limiter", RateLimiter(1000, 1000, 1000, 1000, 1))
+    state = {"calls": 0, "status": 200, "gate": None}
+
+    def check_url(url):
+        state["calls"] += 1
+        if state["gate"] is not None:
+            state["gate"].wait(5)
+        return ScanResult(url, status_code=state["status"]), None
+
+    monkeypatch.setattr(scanner, "check_url", check_url)
+    yield state
+    scanner.clear_caches()
+
+# ---------- TTLCache ----------
+def test_ttl_cache_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(scanner.time, "monotonic", lambda: now[0])
+    c = TTLCache(ttl=10, max_entries=4)
+    c.set("a", 1)
+    c.set("b", 2, ttl=1)
+    now[0] += 5
+    assert c.get("a") == 1
+    assert c.get("b") is scanner._MISSING
+    now[0] += 5
+    assert c.get("a") is scanner._MISSING
+    assert len(c) == 0
+
+def test_ttl_cache_evicts_least_recently_used():
+    c = TTLCache(ttl=60, max_entries=2)
+    c.set("a", 1)
+    c.set("b", 2)
+    assert c.get("a") == 1      # a ist jetzt jünger als b
+    c.set("c", 3)
+    assert c.get("b") is scanner._MISSING
+    assert (c.get("a"), c.get("c")) == (1, 3)
+
+# ---------- normalize_url ----------
+@pytest.mark.parametrize("raw, expected", [
+    ("example.com", "https://example.com/"),
+    ("  HTTPS://Example.COM.  ", "https://example.com/"),
+    ("HTTP://example.com:80/a?b=1#frag", "http://example.com/a?b=1"),
+    ("https://example.com:443/", "https://example.com/"),
+    ("https://example.com:8443/x", "https://example.com:8443/x"),
+    ("http://[::1]:8080/", "http://[::1]:8080/"),
+])
+def test_normalize_url(raw, expected):
+    assert normalize_url(raw) == expected
+
+# ---------- Cache / Coalescing ----------
+def test_success_is_cached(fake_check):
+    first = scanner.scan("example.com")
+    second = scanner.scan("https://EXAMPLE.com/")
+    assert fake_check["calls"] == 1
+    assert second.status_code == 200
+    second.findings.append({"title": "x"})
+    assert scanner.scan("example.com").findings == first.findings
+
+@pytest.mark.parametrize("status", [429, 503, 500, 502])
+def test_throttled_and_5xx_are_not_cached(fake_check, status):
+    fake_check["status"] = status
+    assert scanner.scan("example.com").status_code == status
+    fake_check["status"] = 200
+    assert scanner.scan("example.com").status_code == 200
+    assert fake_check["calls"] == 2
+
+def test_concurrent_scans_share_one_request(fake_check):
+    fake_check["gate"] = threading.Event()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(scanner.scan("example.com")))
+               for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    fake_check["gate"].set()
+    for t in threads:
+        t.join(5)
+    assert fake_check["calls"] == 1
+    assert [r.status_code for r in results] == [200] * 5
+
+def test_reserved_token_is_refunded_without_request(fake_check, monkeypatch):
+    lim = RateLimiter(0.01, 1, 1000, 1000, 0.01)
+    monkeypatch.setattr(scanner, "limiter", lim)
+    keys = lim.keys_for("example.com")
+    assert lim.try_acquire(keys) == 0
+    scanner.scan("example.com", reserved=True)          # echter Request verbraucht das Token
+    assert lim.try_acquire(keys) > 0
+    lim.refund(keys)
+    assert lim.try_acquire(keys) == 0
+    scanner.scan("example.com", reserved=True)          # Cache-Treffer gibt es zurück
+    assert fake_check["calls"] == 1
+    assert lim.try_acquire(keys) == 0
+
+def test_reserved_token_is_refunded_on_dns_failure(fake_check, monkeypatch):
+    lim = RateLimiter(0.01, 1, 1000, 1000, 0.01)
+    monkeypatch.setattr(scanner, "limiter", lim)
+    monkeypatch.setattr(scanner, "resolve_host", lambda host: [])
+    keys = lim.keys_for("example.com")
+    assert lim.try_acquire(keys) == 0
+    assert scanner.scan("example.com", reserved=True).error
+    assert lim.try_acquire(keys) == 0
+
+@pytest.mark.parametrize("raw", ["example.com:abc", "http://[::1"])
+def test_malformed_target_yields_scan_error(fake_check, raw):
+    res = scanner.scan(raw, reserved=True)
+    assert res.error
+    assert res.findings[0]["title"] == "Scan error"
+    assert scanner.scan_target(raw)[0]["title"] == "Scan error"
+    assert fake_check["calls"] == 0
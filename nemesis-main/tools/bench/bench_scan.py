@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Scan-Durchsatz-Benchmark gegen eine lokale Fake-Target-Farm.
+
+Startet Farm + Fake-LLM (Ollama-API), reiht N Targets ein und treibt
+jobs.job_scan_queue mit mehreren Threads, bis die Queue leer ist.
+Ergebnis (targets/s, p50/p99_call_ms je Job-Aufruf, DB-Schreibrate, RSS) landet als JSON in
+tools/bench/results/, damit Commits verglichen werden können.
+
+Beispiel:
+    python tools/bench/bench_scan.py --targets 10000 --concurrency 32
+    python tools/bench/bench_scan.py --targets 10000 --compare tools/bench/results/<alt>.json
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent.parent            # nemesis-main
+sys.path.insert(0, str(HERE))
+sys.path.insert(0, str(ROOT))
+
+import fake_farm  # noqa: E402
+
+def _parse_args():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--targets", type=int, default=10000)
+    p.add_argument("--hosts", type=int, default=1000, help="verschiedene Fake-Hosts")
+    p.add_argument("--duplicates", type=float, default=0.0, help="Anteil doppelter URLs (Cache-Effekt)")
+    p.add_argument("--concurrency", type=int, default=32)
+    p.add_argument("--batch-size", type=int, default=1, help="SCAN_BATCH_SIZE")
+    p.add_argument("--processes", type=int, default=0, help="SCAN_PROCESSES (0 = im Prozess)")
+    p.add_argument("--latency-ms", type=float, default=20.0)
+    p.add_argument("--jitter-ms", type=float, default=5.0)
+    p.add_argument("--error-rate", type=float, default=0.01)
+    p.add_argument("--throttle-rate", type=float, default=0.0, help="Anteil 429-Antworten")
+    p.add_argument("--profiles", default="hardened,partial,bare")
+    p.add_argument("--llm-latency-ms", type=float, default=5.0)
+    p.add_argument("--ai-provider", default="ollama", choices=("ollama", "none"))
+    p.add_argument("--host-rps", type=float, default=1000.0, help="RATE_LIMIT_HOST_RPS für den Lauf")
+    p.add_argument("--seed", type=int, default=1, help="Seed für Latenz-/Fehler-/429-Würfel der Farm")
+    p.add_argument("--out", default=str(HERE / "results"))
+    p.add_argument("--compare", help="früheres Ergebnis-JSON zum Vergleich")
+    return p.parse_args()
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return "unknown"
+
+def _rss_kb() -> int:
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+def _percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    idx = min(len(values) - 1, max(0, int(round(pct / 100 * (len(values) - 1)))))
+    return values[idx]
+
+def _db_rows(storage) -> int:
+    with storage._read() as conn:
+        c = conn.cursor()
+        return sum(c.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+                   for t in ("findings", "jobs_log", "scan_results"))
+
+def run(args) -> dict:
+    farm = fake_farm.start_farm(fake_farm.FarmConfig(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+        profiles=tuple(args.profiles.split(",")), seed=args.seed,
+    ))
+    llm = fake_farm.start_llm(args.llm_latency_ms, seed=args.seed)
+    workdir = tempfile.mkdtemp(prefix="nemesis-bench-")
+
+    # Settings werden beim Import gelesen -> ENV vorher setzen
+    os.environ.update({
+        "NEMESIS_DB_PATH": os.path.join(workdir, "bench.db"),
+        "AI_PROVIDER": args.ai_provider,
+        "OLLAMA_HOST": f"http://127.0.0.1:{llm.port}",
+        "RATE_LIMIT_HOST_RPS": str(args.host_rps),
+        "RATE_LIMIT_HOST_BURST": str(max(2, int(args.host_rps))),
+        "RATE_LIMIT_PLATFORM_RPS": "1000000",
+        "RATE_LIMIT_PLATFORM_BURST": "1000000",
+        "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING"),
+        "SCAN_BATCH_SIZE": str(args.batch_size),
+        "SCAN_PROCESSES": str(args.processes),
+    })
+    os.chdir(workdir)   # nemesis.log landet im Temp-Verzeichnis
+    from agent.src.api import jobs, logging_conf, storage
+
+    storage.init_db()
+    pid = storage.upsert_platform("bench", None, None)
+    hosts = fake_farm.farm_hosts(args.hosts)
+    uniq = max(1, int(args.targets * (1 - args.duplicates)))
+    urls = (f"http://{hosts[i % uniq % len(hosts)]}:{farm.port}/t/{i % uniq}" for i in range(args.targets))
+    t0 = time.perf_counter()
+    storage.queue_targets_bulk(pid, urls, scope="bench")
+    seed_s = time.perf_counter() - t0
+
+    latencies = []      # je job_scan_queue-Aufruf mit Ergebnis
+    scanned_total = [0]
+    lat_lock = threading.Lock()
+    rows_before = _db_rows(storage)
+    rss_before = _rss_kb()
+
+    def worker():
+        while True:
+            s = time.perf_counter()
+            scanned = jobs.job_scan_queue()
+            dt = time.perf_counter() - s
+            if scanned:
+                with lat_lock:
+                    latencies.append(dt)
+                    scanned_total[0] += scanned
+            elif storage.count_queued_targets() == 0:
+                return
+            else:
+                time.sleep(0.05)   # alles gedrosselt, kurz ausweichen
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as ex:
+        for f in [ex.submit(worker) for _ in range(args.concurrency)]:
+            f.result()
+    wall = time.perf_counter() - t0
+    logging_conf.flush_logs()   # jobs_log wird gebündelt geschrieben
+    rows = _db_rows(storage) - rows_before
+
+    farm.stop()
+    llm.stop()
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "seed": args.seed,
+        "params": vars(args),
+        "results": {
+            "targets": scanned_total[0],
+            "job_calls": len(latencies),
+            "wall_s": round(wall, 3),
+            "seed_s": round(seed_s, 3),
+            "targets_per_s": round(scanned_total[0] / wall, 2) if wall else 0.0,
+            # je job_scan_queue-Aufruf (bei --batch-size > 1 also Batch-Latenz)
+            "p50_call_ms": round(_percentile(latencies, 50) * 1000, 2),
+            "p99_call_ms": round(_percentile(latencies, 99) * 1000, 2),
+            "db_rows_per_s": round(rows / wall, 2) if wall else 0.0,
+            "rss_kb": _rss_kb(),
+            "rss_delta_kb": _rss_kb() - rss_before,
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+    }
+
+def compare(current: dict, baseline_path: str):
+    base = json.loads(Path(baseline_path).read_text())
+    print(f"\nVergleich {base.get('commit')} -> {current.get('commit')}")
+    for key, new in current["results"].items():
+        old = base.get("results", {}).get(key)
+        if isinstance(old, (int, float)) and old:
+            print(f"  {key:16} {old:>12} -> {new:>12}  ({(new - old) / old * 100:+.1f}%)")
+        else:
+            print(f"  {key:16} {old!s:>12} -> {new:>12}")
+
+def main():
+    args = _parse_args()
+    out_dir = Path(args.out).resolve()
+    compare_path = str(Path(args.compare).resolve()) if args.compare else None
+    result = run(args)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = out_dir / f"scan-{stamp}-{result['commit']}.json"
+    path.write_text(json.dumps(result, indent=2))
+    print(json.dumps(result["results"], indent=2))
+    print(f"Ergebnis gespeichert: {path}")
+    if compare_path:
+        compare(result, compare_path)
+
+if __name__ == "__main__":
+    main()
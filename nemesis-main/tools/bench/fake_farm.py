@@ -0,0 +1,150 @@
+"""
+Lokale Fake-Target-Farm und Fake-LLM für Benchmarks.
+
+Die Farm lauscht auf allen Loopback-Adressen; jede Adresse aus 127.0.0.0/8
+wirkt wie ein eigener Host (eigener Rate-Limit-Bucket, eigener Header-Satz).
+"""
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+# Header-Profile: Name -> Liste (Header, Wert)
+PROFILES: Dict[str, List[Tuple[str, str]]] = {
+    "hardened": [
+        ("Strict-Transport-Security", "max-age=31536000; includeSubDomains"),
+        ("Content-Security-Policy", "default-src 'self'; frame-ancestors 'none'"),
+        ("X-Content-Type-Options", "nosniff"),
+        ("X-Frame-Options", "DENY"),
+        ("Referrer-Policy", "no-referrer"),
+        ("Permissions-Policy", "camera=()"),
+        ("Set-Cookie", "sid=1; Secure; HttpOnly; SameSite=Lax"),
+    ],
+    "partial": [
+        ("Strict-Transport-Security", "max-age=3600"),
+        ("Content-Security-Policy", "script-src 'self' 'unsafe-inline'"),
+        ("X-Content-Type-Options", "nosniff"),
+        ("Set-Cookie", "sid=1; Secure"),
+    ],
+    "bare": [],
+}
+
+class FarmConfig:
+    def __init__(self, latency_ms: float = 20.0, jitter_ms: float = 5.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 profiles: Tuple[str, ...] = ("hardened", "partial", "bare"), seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate        # Anteil 500er
+        self.throttle_rate = throttle_rate  # Anteil 429er mit Retry-After
+        self.profiles = profiles
+        self.seed = seed
+
+def _sleep(latency_ms: float, jitter_ms: float, rng: random.Random):
+    delay = max(0.0, rng.gauss(latency_ms, jitter_ms)) / 1000
+    if delay:
+        time.sleep(delay)
+
+def _make_target_handler(cfg: FarmConfig):
+    # Zufall je (Host, Pfad, n-ter Abruf) aus dem Seed abgeleitet: gleiche Läufe
+    # liefern dieselben Antworten, unabhängig von der Thread-Reihenfolge
+    hits: Dict[str, int] = {}
+    hits_lock = threading.Lock()
+
+    class TargetHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            key = f"{self.headers.get('Host', '')}{self.path}"
+            with hits_lock:
+                n = hits[key] = hits.get(key, 0) + 1
+            rng = random.Random(f"{cfg.seed}|{key}|{n}")
+            _sleep(cfg.latency_ms, cfg.jitter_ms, rng)
+            roll = rng.random()
+            if roll < cfg.throttle_rate:
+                self._reply(429, [("Retry-After", "1")])
+            elif roll < cfg.throttle_rate + cfg.error_rate:
+                self._reply(500, [])
+            else:
+                host = self.headers.get("Host", "").split(":")[0]
+                profile = cfg.profiles[zlib.crc32(host.encode()) % len(cfg.profiles)]
+                self._reply(200, PROFILES[profile])
+
+        def _reply(self, status: int, headers: List[Tuple[str, str]]):
+            body = b"ok"
+            self.send_response(status)
+            for k, v in headers:
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+    return TargetHandler
+
+def _make_llm_handler(latency_ms: float, seed: int):
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+
+    class LLMHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            self.rfile.read(length)
+            with rng_lock:
+                delay_rng = random.Random(rng.random())
+            _sleep(latency_ms, latency_ms / 4, delay_rng)
+            if self.path.startswith("/api/generate"):
+                payload = {"response": "Fake-Zusammenfassung.", "done": True}
+            else:
+                payload = {"id": "fake", "object": "chat.completion", "choices": [
+                    {"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": "Fake-Zusammenfassung."}}]}
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+    return LLMHandler
+
+class _Server:
+    def __init__(self, handler, host: str = ""):
+        self.httpd = ThreadingHTTPServer((host, 0), handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def start_farm(cfg: FarmConfig) -> _Server:
+    return _Server(_make_target_handler(cfg)).start()
+
+def start_llm(latency_ms: float = 50.0, seed: int = 0) -> _Server:
+    return _Server(_make_llm_handler(latency_ms, seed), host="127.0.0.1").start()
+
+def farm_hosts(n: int) -> List[str]:
+    """n verschiedene Loopback-Adressen (127.0.0.1 ... ), ohne .0/.255-Enden."""
+    hosts = []
+    i = 0
+    while len(hosts) < n:
+        a, b, c = (i >> 16) & 0xFF, (i >> 8) & 0xFF, i & 0xFF
+        i += 1
+        if c in (0, 255):
+            continue
+        hosts.append(f"127.{a}.{b}.{c}")
+    return hosts
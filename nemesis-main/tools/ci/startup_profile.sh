@@ -0,0 +1,29 @@
+#!/usr/bin/env bash
+# Misst die Zeit bis /healthz grün ist und listet die teuersten Imports.
+# Aufruf aus nemesis-main/:  tools/ci/startup_profile.sh [budget_ms]
+set -euo pipefail
+BUDGET_MS=${1:-${STARTUP_BUDGET_MS:-3000}}
+PORT=${STARTUP_PROFILE_PORT:-8099}
+TMP=$(mktemp -d)
+trap 'if [ -n "${PID:-}" ]; then kill "$PID" 2>/dev/null || true; fi; rm -rf "$TMP"' EXIT
+
+export NEMESIS_DB_PATH="$TMP/nemesis.db"
+export NEMESIS_FAST_STARTUP=1
+export AI_PROVIDER=none
+
+echo "== Import-Profil (Top 15, kumulativ in µs) =="
+python -X importtime -c "import agent.src.api.main" 2> "$TMP/importtime.txt" >/dev/null
+grep 'import time:' "$TMP/importtime.txt" | sed 1d | sort -t'|' -k2 -n -r | head -15
+
+echo "== Zeit bis /healthz =="
+START=$(date +%s%N)
+(cd "$TMP" && python -m uvicorn agent.src.api.main:app --app-dir "$OLDPWD" --port "$PORT" --log-level warning) &
+PID=$!
+until curl -fsS "http://127.0.0.1:$PORT/healthz" >/dev/null 2>&1; do
+  kill -0 "$PID" 2>/dev/null || { echo "API beendet sich vorzeitig"; exit 1; }
+  sleep 0.05
+done
+ELAPSED_MS=$(( ($(date +%s%N) - START) / 1000000 ))
+curl -fsS "http://127.0.0.1:$PORT/startup"; echo
+echo "healthz grün nach ${ELAPSED_MS} ms (Budget ${BUDGET_MS} ms)"
+[ "$ELAPSED_MS" -le "$BUDGET_MS" ]